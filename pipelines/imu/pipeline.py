@@ -1,7 +1,13 @@
 import xarray as xr
+from typing import TYPE_CHECKING, Any, List
 
-import matplotlib.pyplot as plt
-from tsdat import IngestPipeline, get_start_date_and_time_str, get_filename
+from tsdat import IngestPipeline, get_start_date_and_time_str
+
+from utils.plotting import plot_histogram, render_figures
+from .readers import IMUDataReader
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
 
 # from utils import format_time_xticks
 
@@ -14,6 +20,25 @@ class Imu(IngestPipeline):
 
     --------------------------------------------------------------------------------"""
 
+    def run(self, inputs: List[str], **kwargs: Any) -> xr.Dataset:
+        # If the IMU reader has a chunk_size, run each chunk of packets through the
+        # pipeline on its own so that it is QC'd and saved before the next chunk is
+        # decoded. Returns the dataset from the last chunk that was processed.
+        readers = getattr(self.retriever, "readers", {})
+        chunked_readers = [
+            reader
+            for reader in readers.values()
+            if isinstance(reader, IMUDataReader) and reader.parameters.chunk_size
+        ]
+        if not chunked_readers:
+            return super().run(inputs, **kwargs)
+
+        dataset = xr.Dataset()
+        for input_key in inputs:
+            for chunk_key in chunked_readers[0].chunk_keys(input_key):
+                dataset = super().run([chunk_key], **kwargs)
+        return dataset
+
     def hook_customize_dataset(self, dataset: xr.Dataset) -> xr.Dataset:
         # Use this hook to modify the dataset before qc is applied
         return dataset
@@ -29,42 +54,36 @@ class Imu(IngestPipeline):
 
         date, time = get_start_date_and_time_str(dataset)
 
-        plt.style.use("default")  # clear any styles that were set before
-        plt.style.use("shared/styling.mplstyle")
-
         with self.storage.uploadable_dir(datastream) as tmp_dir:
+            render_figures(
+                {"buoy_motion_histogram": plot_buoy_motion_histogram},
+                dataset,
+                tmp_dir,
+                location=location,
+                date=date,
+                time=time,
+            )
 
-            fig, ax = plt.subplots()
 
-            avg_roll = f"= {dataset['roll'].data.mean():.3f} deg]"
-            avg_pitch = f"= {dataset['pitch'].data.mean():.3f} deg]"
-            roll_label = r"$\.{\theta}_{roll}$ [$\overline{\theta}_r$" + avg_roll
-            pitch_label = r"$\.{\theta}_{pitch}$ [$\overline{\theta}_p$" + avg_pitch
+def plot_buoy_motion_histogram(
+    dataset: xr.Dataset, location: str, date: str, time: str
+) -> "Figure":
+    import matplotlib.pyplot as plt
 
-            dataset["roll"].plot.hist(
-                bins=100,
-                ax=ax,
-                edgecolor="black",
-                histtype="step",
-                label=roll_label,
-            )
-            dataset["pitch"].plot.hist(
-                bins=100,
-                ax=ax,
-                edgecolor="red",
-                histtype="step",
-                label=pitch_label,
-            )
+    fig, ax = plt.subplots()
 
-            fig.suptitle(f"Buoy Motion Histogram at {location} on {date} {time}")
-            ax.set_xlabel("Buoy Motion (deg)")
-            ax.set_ylabel("Count")
-            ax.set_title("")
-            ax.set_xlim(-25, 25)
-            ax.legend(ncol=2, bbox_to_anchor=(1, -0.04))
+    avg_roll = f"= {dataset['roll'].data.mean():.3f} deg]"
+    avg_pitch = f"= {dataset['pitch'].data.mean():.3f} deg]"
+    roll_label = r"$\.{\theta}_{roll}$ [$\overline{\theta}_r$" + avg_roll
+    pitch_label = r"$\.{\theta}_{pitch}$ [$\overline{\theta}_p$" + avg_pitch
 
-            plot_file = get_filename(
-                dataset, title="buoy_motion_histogram", extension="png"
-            )
-            fig.savefig(tmp_dir / plot_file)
-            plt.close(fig)
+    plot_histogram(ax, dataset["roll"], bins=100, color="black", label=roll_label)
+    plot_histogram(ax, dataset["pitch"], bins=100, color="red", label=pitch_label)
+
+    fig.suptitle(f"Buoy Motion Histogram at {location} on {date} {time}")
+    ax.set_xlabel("Buoy Motion (deg)")
+    ax.set_ylabel("Count")
+    ax.set_title("")
+    ax.set_xlim(-25, 25)
+    ax.legend(ncol=2, bbox_to_anchor=(1, -0.04))
+    return fig
@@ -1,24 +1,31 @@
+import os
 import struct
-import datetime
+import logging
+import functools
 import numpy as np
 import xarray as xr
-from typing import Dict, Union
+from typing import Any, Dict, List, Literal, NamedTuple, Optional, Tuple, Union
 from pydantic import BaseModel, Extra
 from tsdat import DataReader
 
+from utils import gps_to_utc
+
+logger = logging.getLogger(__name__)
+
 
 class DTYPE:
     """Class to wrap matlab data types for python"""
 
-    def __init__(self, format, size):
+    def __init__(self, format, size, numpy):
         self.format = format
         self.size = size
+        self.numpy = numpy
 
 
-UINT8 = DTYPE("c", 1)  # uint8 not in python; use char (c) instead
-UINT16 = DTYPE("h", 2)  # use short (h)
-SINGLE = DTYPE("f", 4)  # use python float (f)
-DOUBLE = DTYPE("d", 8)  # use python double (d)
+UINT8 = DTYPE("c", 1, "u1")  # uint8 not in python; use char (c) instead
+UINT16 = DTYPE("h", 2, ">i2")  # use short (h)
+SINGLE = DTYPE("f", 4, ">f4")  # use python float (f)
+DOUBLE = DTYPE("d", 8, ">f8")  # use python double (d)
 
 
 # Morro Bay
@@ -122,6 +129,26 @@ humbolt_packet = {
     "chksum": {"msb": UINT8, "lsb": UINT8},
 }
 
+# Separates the file path from the chunk index in chunked input keys
+CHUNK_SEPARATOR = "::"
+
+# Every packet starts with these two sync bytes
+SYNC1 = 0x75
+SYNC2 = 0x65
+
+# Packet layouts that can be detected from the contents of a file
+PACKET_LAYOUTS: Dict[str, Dict[str, Dict]] = {
+    "morro": morro_packet,
+    "humboldt": humbolt_packet,
+}
+
+
+def register_packet_layout(name: str, packet: Dict[str, Dict]):
+    """Registers a new packet layout so that it is considered by
+    `detect_packet_layout`. If several layouts match a file equally well, the one
+    registered first is used."""
+    PACKET_LAYOUTS[name] = packet
+
 
 def fread(fileObj, dtype):
     buffer = fileObj.read(dtype.size)
@@ -131,88 +158,374 @@ def fread(fileObj, dtype):
     return val
 
 
+# Output variable name -> (packet category, adjacent field names)
+IMU_VARIABLES = {
+    "roll": ("rpy", ["roll"]),
+    "pitch": ("rpy", ["pitch"]),
+    "yaw": ("rpy", ["yaw"]),
+    "gyro": ("gyro", ["x", "y", "z"]),
+    "accel": ("accel", ["x", "y", "z"]),
+    "mag": ("mag", ["x", "y", "z"]),
+    "pres": ("pressure", ["data"]),
+}
+
+
+def packet_dtype(packet: Dict[str, Dict]) -> np.dtype:
+    """Builds a big-endian numpy structured dtype that mirrors the packet layout, so
+    each packet category can be accessed as a nested record field."""
+    return np.dtype(
+        [
+            (category, [(name, dtype.numpy) for name, dtype in subpacket.items()])
+            for category, subpacket in packet.items()
+        ]
+    )
+
+
+def packet_size(subpacket: Dict[str, DTYPE]) -> int:
+    return sum(dtype.size for dtype in subpacket.values())
+
+
+def detect_packet_layout(input_key: str, scan_size: int = 4096) -> str:
+    """Determines the registered packet layout of the file by scanning its first
+    `scan_size` bytes for packets of each layout (sync bytes, payload size and
+    checksum) and picking the layout with the most valid packets. Dropped or corrupt
+    bytes near the start of the file only cost the packets they touch. Ties go to the
+    layout registered first."""
+    with open(input_key, "rb") as bfile:
+        head = bfile.read(scan_size)
+
+    counts = {
+        name: len(find_packets(head, packet)) for name, packet in PACKET_LAYOUTS.items()
+    }
+    name = max(counts, key=lambda name: counts[name])  # first of any ties
+    if not counts[name]:
+        raise ValueError(
+            f"Could not match the packets in '{input_key}' to any of the registered"
+            f" packet layouts: {list(PACKET_LAYOUTS)}"
+        )
+    return name
+
+
+def find_packets(
+    buffer: Any, packet: Dict[str, Dict], block_size: int = 1 << 24
+) -> np.ndarray:
+    """Returns the byte offset of every position in the buffer that starts a packet
+    with the layout's sync bytes and payload size and a valid Fletcher checksum. The
+    buffer is scanned in blocks to bound the size of temporary arrays."""
+    dtype = packet_dtype(packet)
+    size = dtype.itemsize
+    payload_size_offset = dtype["header"].fields["payload_size"][1]
+    payload_size = size - packet_size(packet["header"]) - packet_size(packet["chksum"])
+    chksum_offset = dtype.fields["chksum"][1]
+
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    n_candidates = len(data) - size + 1
+    offsets = [np.empty(0, dtype=np.int64)]
+    for block_start in range(0, max(n_candidates, 0), block_size):
+        n = min(block_size, n_candidates - block_start)
+        block = data[block_start : block_start + n + size - 1]
+
+        starts = np.flatnonzero(
+            (block[:n] == SYNC1)
+            & (block[1 : n + 1] == SYNC2)
+            & (block[payload_size_offset : n + payload_size_offset] == payload_size)
+        )
+
+        # The Fletcher checksum of bytes [p, p + m) is sum1 = sum(b[k]) and
+        # sum2 = sum((p + m - k) * b[k]) (mod 256), which can be taken from running
+        # sums of b[k] and k * b[k] that wrap around in uint8 arithmetic.
+        weights = np.resize(np.arange(256, dtype=np.uint8), len(block))
+        sum_b = np.zeros(len(block) + 1, dtype=np.uint8)
+        sum_kb = np.zeros(len(block) + 1, dtype=np.uint8)
+        np.cumsum(block, dtype=np.uint8, out=sum_b[1:])
+        np.cumsum(weights * block, dtype=np.uint8, out=sum_kb[1:])
+
+        ends = starts + chksum_offset
+        sum1 = sum_b[ends] - sum_b[starts]
+        sum2 = (ends % 256).astype(np.uint8) * sum1 - (sum_kb[ends] - sum_kb[starts])
+        valid = (sum1 == block[ends]) & (sum2 == block[ends + 1])
+        offsets.append(block_start + starts[valid])
+
+    return np.concatenate(offsets)
+
+
+def packet_segments(
+    offsets: np.ndarray, size: int
+) -> Tuple[List[Tuple[int, int]], int, int]:
+    """Groups valid packet offsets into runs of back-to-back packets. Runs are taken
+    in file order, skipping any packets that overlap a run that was already taken.
+
+    Returns:
+        Tuple[List[Tuple[int, int]], int, int]: The (offset, count) of each run, the
+        number of packets dropped between runs, and the number of resyncs needed.
+
+    """
+    if not len(offsets):
+        return [], 0, 0
+
+    # Sorting by offset within each residue class puts chained packets next to each
+    # other, so runs can be split wherever two neighbors are not `size` bytes apart
+    chained = offsets[np.lexsort((offsets, offsets % size))]
+    breaks = np.flatnonzero(np.diff(chained) != size) + 1
+    heads = chained[np.r_[0, breaks]]
+    lengths = np.diff(np.r_[0, breaks, len(chained)])
+    order = np.argsort(heads)
+
+    segments: List[Tuple[int, int]] = []
+    end, dropped, resyncs = 0, 0, 0
+    for head, length in zip(heads[order].tolist(), lengths[order].tolist()):
+        skip = max(0, -(-(end - head) // size))
+        if skip >= length:
+            continue
+        start = head + skip * size
+        if start > end:
+            dropped += -(-(start - end) // size)
+            resyncs += 1
+        segments.append((start, length - skip))
+        end = start + (length - skip) * size
+
+    return segments, dropped, resyncs
+
+
+def field_view(
+    buffer: Any,
+    dtype: np.dtype,
+    count: int,
+    category: str,
+    names: List[str],
+    start: int = 0,
+) -> np.ndarray:
+    """Returns a strided view over the named fields of `count` packets starting at
+    byte `start` of the buffer without copying. Multiple names must be adjacent fields
+    of the same type and are exposed as the second axis of the view."""
+    category_offset = dtype.fields[category][1]
+    field_dtype, field_offset = dtype[category].fields[names[0]]
+    for i, name in enumerate(names[1:], start=1):
+        _dtype, _offset = dtype[category].fields[name]
+        if _dtype != field_dtype or _offset != field_offset + i * field_dtype.itemsize:
+            raise ValueError(f"Fields {names} of '{category}' are not adjacent.")
+
+    shape, strides = (count,), (dtype.itemsize,)
+    if len(names) > 1:
+        shape, strides = (count, len(names)), (dtype.itemsize, field_dtype.itemsize)
+    return np.ndarray(
+        shape,
+        dtype=field_dtype,
+        buffer=buffer,
+        offset=start + category_offset + field_offset,
+        strides=strides,
+    )
+
+
 def extract_data(input_key: str, packet: Dict[str, Dict]) -> xr.Dataset:
-    # Create dictionary to hold raw binary data
-    raw_data = {
-        category: {var_name: [] for var_name in subpacket.keys()}
-        for category, subpacket in packet.items()
+    # Preallocate output arrays for the number of packets the file can hold. Values
+    # missing from a truncated trailing packet are left as NaN.
+    n_packets = -(-os.path.getsize(input_key) // packet_dtype(packet).itemsize)
+    week_number, tow = np.full(n_packets, np.nan), np.full(n_packets, np.nan)
+    variables = {
+        var_name: np.full((n_packets, len(names))[: 1 + (len(names) > 1)], np.nan)
+        for var_name, (category, names) in IMU_VARIABLES.items()
     }
 
-    # Read the binary data from file and append to raw data dictionary
+    # Map each packet field to the (column of the) output array it is stored in
+    targets = {("gps_time", "week_number"): week_number, ("gps_time", "tow"): tow}
+    for var_name, (category, names) in IMU_VARIABLES.items():
+        for i, name in enumerate(names):
+            values = variables[var_name]
+            targets[(category, name)] = values[:, i] if values.ndim == 2 else values
+
+    # Read the binary data from file straight into the output arrays
+    n = 0
     with open(input_key, "rb") as bfile:
         try:
             while True:
                 for category, subpacket in packet.items():
                     for name, dtype in subpacket.items():
                         _data = fread(bfile, dtype)
-                        if name:
-                            raw_data[category][name].append(_data)
+                        if (category, name) in targets:
+                            targets[(category, name)][n] = _data
+                n += 1
         except struct.error:
-            if "z05" in input_key and not (category == "header" and name == "sync1"):
-                raise
-
-    # Convert raw data into numpy arrays
-    data = {
-        category: {
-            var_name: np.array(subpacket[var_name]) for var_name in subpacket.keys()
-        }
-        for category, subpacket in raw_data.items()
+            pass  # Reached the end of the file
+
+    # Keep a truncated trailing packet if its gps time could be read
+    if n < n_packets and not np.isnan(week_number[n]) and not np.isnan(tow[n]):
+        n += 1
+    variables = {var_name: values[:n] for var_name, values in variables.items()}
+
+    return build_dataset(week_number[:n], tow[:n], variables)
+
+
+class PacketScan(NamedTuple):
+    segments: List[Tuple[int, int]]
+    """The (offset, count) of each run of back-to-back valid packets."""
+
+    tail: bytes
+    """The bytes of a truncated packet at the end of the file, if any."""
+
+    dropped: int
+    """The number of corrupt packets that were skipped."""
+
+    resyncs: int
+    """The number of times the scanner had to search for the next sync bytes."""
+
+
+def open_buffer(input_key: str, memory_map: bool = False) -> Any:
+    if memory_map and os.path.getsize(input_key):
+        return np.memmap(input_key, dtype=np.uint8, mode="r")
+    with open(input_key, "rb") as bfile:
+        return bfile.read()
+
+
+def scan_packets(buffer: Any, packet: Dict[str, Dict]) -> PacketScan:
+    """Locates packets from their sync bytes and checksums so that corrupt packets are
+    dropped instead of shifting every packet that follows them."""
+    size = packet_dtype(packet).itemsize
+    offsets = find_packets(buffer, packet)
+    segments, dropped, resyncs = packet_segments(offsets, size)
+    end = segments[-1][0] + segments[-1][1] * size if segments else 0
+
+    # Keep a truncated trailing packet so the fields it fully contains can be used
+    remainder = len(buffer) - end
+    tail = bytes(buffer[end:])
+    if remainder >= size or not tail.startswith(bytes([SYNC1, SYNC2])):
+        dropped += -(-remainder // size)
+        resyncs += bool(remainder)
+        tail = b""
+
+    return PacketScan(segments, tail, dropped, resyncs)
+
+
+@functools.lru_cache(maxsize=4)
+def _scan_file(input_key: str, layout: str, size: int, mtime_ns: int) -> PacketScan:
+    return scan_packets(open_buffer(input_key, True), PACKET_LAYOUTS[layout])
+
+
+def scan_file(input_key: str, layout: str) -> PacketScan:
+    """Returns the PacketScan of the file, reusing the previous scan if the file has
+    not changed since."""
+    stat = os.stat(input_key)
+    return _scan_file(input_key, layout, stat.st_size, stat.st_mtime_ns)
+
+
+def chunk_segments(
+    segments: List[Tuple[int, int]], chunk_size: int, size: int
+) -> List[List[Tuple[int, int]]]:
+    """Splits runs of `size` byte packets into chunks holding at most `chunk_size`
+    packets each. Always returns at least one (possibly empty) chunk."""
+    chunks: List[List[Tuple[int, int]]] = [[]]
+    n_packets = 0
+    for start, length in segments:
+        while length:
+            if n_packets == chunk_size:
+                chunks.append([])
+                n_packets = 0
+            count = min(length, chunk_size - n_packets)
+            chunks[-1].append((start, count))
+            n_packets += count
+            length -= count
+            start += count * size
+    return chunks
+
+
+def decode_packets(
+    buffer: Any,
+    packet: Dict[str, Dict],
+    segments: List[Tuple[int, int]],
+    tail: bytes = b"",
+) -> xr.Dataset:
+    """Decodes the runs of packets in the buffer (and the fields fully contained in
+    the truncated trailing packet, if given) into a dataset."""
+    dtype = packet_dtype(packet)
+    count = sum(length for _, length in segments)
+    tail_record = np.frombuffer(tail.ljust(dtype.itemsize, b"\0"), dtype=dtype)
+
+    def field_end(category: str, name: str) -> int:
+        field_dtype, field_offset = dtype[category].fields[name]
+        return dtype.fields[category][1] + field_offset + field_dtype.itemsize
+
+    # Keep a truncated trailing packet if its gps time can be read
+    has_tail = len(tail) >= max(
+        field_end("gps_time", "week_number"), field_end("gps_time", "tow")
+    )
+
+    def decode(category: str, names: List[str]) -> np.ndarray:
+        views = [
+            field_view(buffer, dtype, length, category, names, start)
+            for start, length in segments
+        ]
+        tail_view = field_view(tail_record, dtype, 1, category, names)
+
+        # Match the native float64 / int64 values produced by struct.unpack. Only
+        # copy out of the buffer if a conversion, a resync or the trailing value is
+        # needed. Values missing from the trailing packet are left as NaN.
+        native = np.dtype(np.float64 if tail_view.dtype.kind == "f" else np.int64)
+        if len(views) == 1 and views[0].dtype == native and not has_tail:
+            return views[0]
+        values = np.empty((count + has_tail, *tail_view.shape[1:]), dtype=native)
+        i = 0
+        for view in views:
+            values[i : i + len(view)] = view
+            i += len(view)
+        if has_tail and len(tail) >= field_end(category, names[-1]):
+            values[count:] = tail_view
+        elif has_tail:
+            values[count:] = np.nan
+        return values
+
+    variables = {
+        var_name: decode(category, names)
+        for var_name, (category, names) in IMU_VARIABLES.items()
     }
 
+    return build_dataset(
+        decode("gps_time", ["week_number"]), decode("gps_time", ["tow"]), variables
+    )
+
+
+def decode_data(
+    input_key: str, packet: Dict[str, Dict], memory_map: bool = False
+) -> xr.Dataset:
+    buffer = open_buffer(input_key, memory_map)
+    scan = scan_packets(buffer, packet)
+    if scan.dropped:
+        logger.warning(
+            "Dropped %s corrupt packet(s) from '%s' after %s resync(s)",
+            scan.dropped,
+            input_key,
+            scan.resyncs,
+        )
+
+    dataset = decode_packets(buffer, packet, scan.segments, scan.tail)
+    dataset.attrs["packets_dropped"] = scan.dropped
+    dataset.attrs["packet_resyncs"] = scan.resyncs
+    return dataset
+
+
+def split_chunk_key(input_key: str) -> Tuple[str, Optional[int]]:
+    """Splits an input key like 'path/to/file.imu.bin::3' into the file path and the
+    chunk index. Returns None for the chunk index of a plain file path."""
+    path, sep, chunk = input_key.rpartition(CHUNK_SEPARATOR)
+    if sep and chunk.isdigit():
+        return path, int(chunk)
+    return input_key, None
+
+
+def build_dataset(
+    week_number: np.ndarray, tow: np.ndarray, variables: Dict[str, np.ndarray]
+) -> xr.Dataset:
     # Create datetime array from gps times
-    time = [datetime.datetime(year=1980, month=1, day=6)] * len(data["gps_time"]["tow"])
-    for i in range(len(time)):
-        days = int(7 * data["gps_time"]["week_number"][i])
-        seconds = (
-            data["gps_time"]["tow"][i] - 18
-        )  # GPS time to UTC is currently 18 seconds off
-        time[i] += datetime.timedelta(days=days, seconds=seconds)
-    time = np.array(time, dtype=np.datetime64)
-
-    # Create handles for variables
-    roll = np.array(data["rpy"]["roll"])
-    pitch = np.array(data["rpy"]["pitch"])
-    yaw = np.array(data["rpy"]["yaw"])
-    gyro = np.array(
-        [data["gyro"]["x"], data["gyro"]["y"], data["gyro"]["z"]]
-    ).transpose()
-    accel = np.array(
-        [data["accel"]["x"], data["accel"]["y"], data["accel"]["z"]]
-    ).transpose()
-    mag = np.array([data["mag"]["x"], data["mag"]["y"], data["mag"]["z"]]).transpose()
-    pres = np.array(data["pressure"]["data"])
+    time = gps_to_utc(week_number, tow)
 
     # Create data dictionary and return dataset
     dictionary = {
         # Dimensions / coordinates
         "time": {"dims": ["time"], "data": time},
         "space": {"dims": ["space"], "data": ["x", "y", "z"]},
-        # Data variables
-        "roll": {"dims": ["time"], "data": roll},
-        "pitch": {"dims": ["time"], "data": pitch},
-        "yaw": {"dims": ["time"], "data": yaw},
-        "gyro": {"dims": ["time", "space"], "data": gyro},
-        "accel": {"dims": ["time", "space"], "data": accel},
-        "mag": {"dims": ["time", "space"], "data": mag},
-        "pres": {"dims": ["time"], "data": pres},
     }
-
-    expected_len = len(time)
-    for var_name, data_dict in dictionary.items():
-        if var_name in ("time", "space"):
-            continue
-        data = data_dict["data"]
-        pad_len = expected_len - len(data)
-
-        if pad_len == 0:
-            continue
-
-        if len(data_dict["dims"]) == 2:
-            data_dict["data"] = np.append(
-                data_dict["data"], pad_len * [[-9999, -9999, -9999]], axis=0
-            )
-        else:
-            data_dict["data"] = np.pad(data, (0, pad_len), constant_values=-9999)
+    for var_name, values in variables.items():
+        dims = ["time", "space"] if values.ndim == 2 else ["time"]
+        dictionary[var_name] = {"dims": dims, "data": values}
 
     return xr.Dataset.from_dict(dictionary)
 
@@ -227,15 +540,70 @@ class IMUDataReader(DataReader):
 
         """
 
+        decoder: Literal["numpy", "struct"] = "numpy"
+        """The method used to decode packets. 'numpy' decodes the whole file at once
+        using a structured dtype, dropping packets with bad checksums; 'struct' unpacks
+        the file one field at a time without validating packets."""
+
+        packet_layout: Optional[str] = None
+        """The name of the registered packet layout to use. If not provided, the layout
+        is detected from the first few packets in the file."""
+
+        memory_map: bool = False
+        """If True (and decoder is 'numpy'), the file is memory-mapped and each field is
+        read through a strided view over the mapping instead of reading the whole file
+        into memory first. Recommended for very large or concatenated files."""
+
+        chunk_size: Optional[int] = None
+        """If set, the Imu pipeline splits each file into chunks of this many packets
+        and retrieves, QCs and saves each chunk before decoding the next, so memory use
+        depends on the chunk size instead of the file length. Chunks are always decoded
+        with the 'numpy' decoder from a memory-mapped file."""
+
+    parameters: Parameters = Parameters()
+
+    def chunk_keys(self, input_key: str) -> List[str]:
+        """Returns one input key per chunk of `chunk_size` packets in the file, or just
+        the input key if chunking is disabled."""
+        if not self.parameters.chunk_size:
+            return [input_key]
+        layout = self.parameters.packet_layout or detect_packet_layout(input_key)
+        packet = PACKET_LAYOUTS[layout]
+        scan = scan_file(input_key, layout)
+        chunks = chunk_segments(
+            scan.segments, self.parameters.chunk_size, packet_dtype(packet).itemsize
+        )
+        return [f"{input_key}{CHUNK_SEPARATOR}{i}" for i in range(len(chunks))]
+
     def read(
         self, input_key: str, **kwargs
     ) -> Union[xr.Dataset, Dict[str, xr.Dataset]]:
+        input_key, chunk = split_chunk_key(input_key)
 
-        # Determine which packet to use.
-        dataset = None
-        try:
-            dataset = extract_data(input_key, morro_packet)
-        except struct.error:
-            dataset = extract_data(input_key, humbolt_packet)
+        # Determine which packet to use and record it so it can be audited later
+        layout = self.parameters.packet_layout or detect_packet_layout(input_key)
+        packet = PACKET_LAYOUTS[layout]
+        if chunk is not None:
+            dataset = self._read_chunk(input_key, layout, chunk)
+        elif self.parameters.decoder == "struct":
+            dataset = extract_data(input_key, packet)
+        else:
+            dataset = decode_data(input_key, packet, self.parameters.memory_map)
+        dataset.attrs["packet_layout"] = layout
+
+        return dataset
+
+    def _read_chunk(self, input_key: str, layout: str, chunk: int) -> xr.Dataset:
+        packet = PACKET_LAYOUTS[layout]
+        scan = scan_file(input_key, layout)
+        size = packet_dtype(packet).itemsize
+        n_packets = sum(length for _, length in scan.segments)
+        chunk_size = self.parameters.chunk_size or max(n_packets, 1)
+        chunks = chunk_segments(scan.segments, chunk_size, size)
+        tail = scan.tail if chunk == len(chunks) - 1 else b""
 
+        buffer = open_buffer(input_key, memory_map=True)
+        dataset = decode_packets(buffer, packet, chunks[chunk], tail)
+        dataset.attrs["packets_dropped"] = scan.dropped
+        dataset.attrs["packet_resyncs"] = scan.resyncs
         return dataset
@@ -2,6 +2,8 @@ import xarray as xr
 from pathlib import Path
 from tsdat import PipelineConfig, assert_close
 
+from pipelines.imu.readers import IMUDataReader, detect_packet_layout
+
 
 def test_imu_morro():
     config_path = Path("pipelines/imu/config/pipeline_morro.yaml")
@@ -16,6 +18,7 @@ def test_imu_morro():
     dataset = pipeline.run([test_file])
     expected: xr.Dataset = xr.open_dataset(expected_file)  # type: ignore
     assert_close(dataset, expected, check_attrs=False)
+    assert dataset.attrs["packet_layout"] == "morro"
 
 
 def test_imu_humboldt():
@@ -31,6 +34,7 @@ def test_imu_humboldt():
     dataset = pipeline.run([test_file])
     expected: xr.Dataset = xr.open_dataset(expected_file)  # type: ignore
     assert_close(dataset, expected, check_attrs=False)
+    assert dataset.attrs["packet_layout"] == "humboldt"
 
 
 def test_imu_oahu():
@@ -46,3 +50,60 @@ def test_imu_oahu():
     dataset = pipeline.run([test_file])
     expected: xr.Dataset = xr.open_dataset(expected_file)  # type: ignore
     assert_close(dataset, expected, check_attrs=False)
+
+
+def test_imu_decoders_match():
+    test_file = "pipelines/imu/test/data/input/buoy.z07.00.20221123.213000.imu.bin"
+
+    expected = IMUDataReader(parameters={"decoder": "struct"}).read(test_file)
+    dataset = IMUDataReader(parameters={"decoder": "numpy"}).read(test_file)
+    xr.testing.assert_equal(dataset, expected)
+
+    mapped = IMUDataReader(parameters={"memory_map": True}).read(test_file)
+    xr.testing.assert_identical(mapped, dataset)
+
+
+def test_imu_resync(tmp_path: Path):
+    test_file = "pipelines/imu/test/data/input/buoy.z06.00.20201201.000000.imu.bin"
+    expected = IMUDataReader().read(test_file)
+
+    # Drop a byte from the 11th packet and corrupt the payload of the 101st packet
+    data = bytearray(Path(test_file).read_bytes())
+    data[100 * 82 + 20] ^= 0xFF
+    del data[10 * 82 + 5]
+    corrupt_file = tmp_path / "buoy.z06.00.20201201.000000.imu.bin"
+    corrupt_file.write_bytes(data)
+
+    dataset = IMUDataReader().read(corrupt_file.as_posix())
+    assert dataset.attrs["packets_dropped"] == 2
+    assert dataset.attrs["packet_resyncs"] == 2
+    xr.testing.assert_equal(dataset, expected.drop_isel(time=[10, 100]))
+
+
+def test_imu_layout_with_early_dropped_byte(tmp_path: Path):
+    test_file = "pipelines/imu/test/data/input/buoy.z06.00.20201201.000000.imu.bin"
+    expected = IMUDataReader().read(test_file)
+
+    # Drop a byte from the 3rd packet, within the bytes used to detect the layout
+    data = bytearray(Path(test_file).read_bytes())
+    del data[2 * 82 + 5]
+    corrupt_file = tmp_path / "buoy.z06.00.20201201.000000.imu.bin"
+    corrupt_file.write_bytes(data)
+
+    assert detect_packet_layout(corrupt_file.as_posix()) == "morro"
+    dataset = IMUDataReader().read(corrupt_file.as_posix())
+    assert dataset.attrs["packet_layout"] == "morro"
+    xr.testing.assert_equal(dataset, expected.drop_isel(time=[2]))
+
+
+def test_imu_chunks():
+    test_file = "pipelines/imu/test/data/input/buoy.z07.00.20221123.213000.imu.bin"
+    expected = IMUDataReader().read(test_file)
+
+    reader = IMUDataReader(parameters={"chunk_size": 4000})
+    chunk_keys = reader.chunk_keys(test_file)
+    assert len(chunk_keys) == 4
+
+    chunks = [reader.read(chunk_key) for chunk_key in chunk_keys]
+    assert all(chunk.sizes["time"] <= 4001 for chunk in chunks)
+    xr.testing.assert_identical(xr.concat(chunks, dim="time"), expected)
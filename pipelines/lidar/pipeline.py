@@ -1,10 +1,16 @@
-import cmocean
-import matplotlib.pyplot as plt
+from typing import TYPE_CHECKING
+
 import numpy as np
 import xarray as xr
-from tsdat import IngestPipeline, get_filename, get_start_date_and_time_str
+from tsdat import IngestPipeline, get_start_date_and_time_str
+
+from utils.plotting import bin_time, decimate_minmax, render_figures
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
 
-from utils import add_colorbar, format_time_xticks
+MAX_ARROWS = 300
+"""The maximum number of time steps with wind direction arrows in the lidar plots."""
 
 
 class Lidar(IngestPipeline):
@@ -41,97 +47,114 @@ class Lidar(IngestPipeline):
         return dataset
 
     def hook_plot_dataset(self, dataset: xr.Dataset):
-        ds = dataset
         location = self.dataset_config.attrs.location_id
         datastream: str = self.dataset_config.attrs.datastream
 
         date, time = get_start_date_and_time_str(dataset)
 
-        plt.style.use("default")  # clear any styles that were set before
-        plt.style.use("shared/styling.mplstyle")
-
         with self.storage.uploadable_dir(datastream) as tmp_dir:
-            fig, ax = plt.subplots()
-            heights = dataset["height"].data[::3]
-            for i, height in enumerate(heights):
-                velocity = ds.wind_speed.sel(height=height)
-                velocity.plot(
-                    ax=ax,
-                    linewidth=2,
-                    c=cmocean.cm.deep_r(i / len(heights)),
-                    label=f"{height} m",
-                )
-
-            # format_time_xticks(ax)
-            ax.legend(
-                facecolor="white",
-                ncol=len(heights),
-                bbox_to_anchor=(1, -0.05),
+            render_figures(
+                {
+                    "wind_speeds": plot_wind_speeds,
+                    "wind_speed_and_direction": plot_wind_speed_and_direction,
+                },
+                dataset,
+                tmp_dir,
+                location=location,
+                date=date,
+                time=time,
             )
-            ax.set_title("")  # Remove bogus title created by xarray
-            fig.suptitle(f"Wind Speed Time Series at {location} on {date} {time}")
-            ax.set_ylabel(r"Wind Speed (ms$^{-1}$)")
-            ax.set_xlabel("Time (UTC)")
 
-            plot_file = get_filename(dataset, title="wind_speeds", extension="png")
-            fig.savefig(tmp_dir / plot_file)
-            plt.close(fig)
 
-        # Create the second plot – Lidar wind speed and direction at all elevations
-        # and a data availability quality metric.
-        with self.storage.uploadable_dir(datastream) as tmp_dir:
-            # Reduce dimensionality of dataset – otherwise the details are obscured
-            ds_1H: xr.Dataset = ds.resample(time="1H").nearest()
-
-            # Calculations for quiver plot
-            qv_slice = slice(1, None)  # Start at 1 to prevent overlap with ax border
-            qv_degrees = ds_1H.wind_direction.data[qv_slice].transpose()
-            qv_theta = (qv_degrees + 90) * (np.pi / 180)
-            X, Y = ds_1H.time.data[qv_slice], ds_1H.height.data
-            U, V = np.cos(-qv_theta), np.sin(-qv_theta)
-
-            fig, axs = plt.subplots(nrows=2)
-            fig.suptitle(f"Wind Speed and Direction at {location} on {date} {time}")
-
-            # Make top subplot – contour + quiver plot for wind speed and direction
-            csf = ds.wind_speed.plot.contourf(
-                ax=axs[0],
-                x="time",
-                levels=30,
-                cmap=cmocean.cm.deep_r,
-                add_colorbar=False,
-            )
-            axs[0].quiver(
-                X,
-                Y,
-                U,
-                V,
-                width=0.002,
-                scale=60,
-                color="white",
-                pivot="middle",
-                zorder=10,
-            )
-            add_colorbar(axs[0], csf, r"Wind Speed (ms$^{-1}$)")
-
-            # Make bottom subplot -- heatmap of data availability
-            da = ds.data_availability.plot(
-                ax=axs[1],
-                x="time",
-                cmap=cmocean.cm.amp_r,
-                add_colorbar=False,
-                vmin=0,
-                vmax=100,
-            )
-            add_colorbar(axs[1], da, "Availability (%)")
-
-            for i in range(2):
-                # format_time_xticks(axs[i])
-                axs[i].set_xlabel("Time (UTC)")
-                axs[i].set_ylabel("Height ASL (m)")
-
-            plot_file = get_filename(
-                dataset, title="wind_speed_and_direction", extension="png"
-            )
-            fig.savefig(tmp_dir / plot_file)
-            plt.close(fig)
+def plot_wind_speeds(ds: xr.Dataset, location: str, date: str, time: str) -> "Figure":
+    import cmocean
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots()
+    heights = ds["height"].data[::3]
+    for i, height in enumerate(heights):
+        velocity = decimate_minmax(ds.wind_speed.sel(height=height))
+        velocity.plot(
+            ax=ax,
+            linewidth=2,
+            c=cmocean.cm.deep_r(i / len(heights)),
+            label=f"{height} m",
+        )
+
+    # format_time_xticks(ax)
+    ax.legend(
+        facecolor="white",
+        ncol=len(heights),
+        bbox_to_anchor=(1, -0.05),
+    )
+    ax.set_title("")  # Remove bogus title created by xarray
+    fig.suptitle(f"Wind Speed Time Series at {location} on {date} {time}")
+    ax.set_ylabel(r"Wind Speed (ms$^{-1}$)")
+    ax.set_xlabel("Time (UTC)")
+    return fig
+
+
+def plot_wind_speed_and_direction(
+    ds: xr.Dataset, location: str, date: str, time: str
+) -> "Figure":
+    """Lidar wind speed and direction at all elevations and a data availability quality
+    metric."""
+    import cmocean
+    import matplotlib.pyplot as plt
+
+    from utils import add_colorbar
+
+    # Reduce dimensionality of dataset – otherwise the details are obscured. Long
+    # records are thinned further so at most MAX_ARROWS columns of arrows are drawn
+    ds_1H: xr.Dataset = ds.resample(time="1H").nearest()
+    step = -(-ds_1H.sizes["time"] // MAX_ARROWS)  # ceil
+    ds_1H = ds_1H.isel(time=slice(None, None, step))
+
+    # Calculations for quiver plot
+    qv_slice = slice(1, None)  # Start at 1 to prevent overlap with ax border
+    qv_degrees = ds_1H.wind_direction.data[qv_slice].transpose()
+    qv_theta = (qv_degrees + 90) * (np.pi / 180)
+    X, Y = ds_1H.time.data[qv_slice], ds_1H.height.data
+    U, V = np.cos(-qv_theta), np.sin(-qv_theta)
+
+    fig, axs = plt.subplots(nrows=2)
+    fig.suptitle(f"Wind Speed and Direction at {location} on {date} {time}")
+
+    # Make top subplot – contour + quiver plot for wind speed and direction
+    csf = bin_time(ds.wind_speed).plot.contourf(
+        ax=axs[0],
+        x="time",
+        levels=30,
+        cmap=cmocean.cm.deep_r,
+        add_colorbar=False,
+    )
+    axs[0].quiver(
+        X,
+        Y,
+        U,
+        V,
+        width=0.002,
+        scale=60,
+        color="white",
+        pivot="middle",
+        zorder=10,
+    )
+    add_colorbar(axs[0], csf, r"Wind Speed (ms$^{-1}$)")
+
+    # Make bottom subplot -- heatmap of data availability
+    da = bin_time(ds.data_availability).plot(
+        ax=axs[1],
+        x="time",
+        cmap=cmocean.cm.amp_r,
+        add_colorbar=False,
+        vmin=0,
+        vmax=100,
+    )
+    add_colorbar(axs[1], da, "Availability (%)")
+
+    for i in range(2):
+        # format_time_xticks(axs[i])
+        axs[i].set_xlabel("Time (UTC)")
+        axs[i].set_ylabel("Height ASL (m)")
+
+    return fig
@@ -1,4 +1,4 @@
-from typing import Dict, Union
+from typing import Dict, Literal, TextIO, Union
 from pydantic import BaseModel, Extra
 import xarray as xr
 import pandas as pd
@@ -8,6 +8,104 @@ import lzma
 from tsdat import DataReader
 
 
+RAW_CATEGORIES = [
+    "Wind Speed (m/s)",
+    "Wind Speed Dispersion (m/s)",
+    "Wind Speed min (m/s)",
+    "Wind Speed max (m/s)",
+    "Wind Direction (°)",
+    "Z-wind (m/s)",
+    "Z-wind Dispersion (m/s)",
+    "CNR (dB)",
+    "Dopp Spect Broad (m/s)",
+    "Data Availability (%)",
+]
+OUTPUT_VAR_NAMES = [
+    "wind_speed",
+    "horizontal_dispersion",
+    "min_wind_speed",
+    "max_wind_speed",
+    "wind_direction",
+    "vertical_wind_speed",
+    "vertical_dispersion",
+    "carrier_noise_ratio",
+    "doppler_spectral_broadening",
+    "data_availability",
+]
+
+# Used if we don't find the altitudes in the input file
+DEFAULT_HEIGHTS = [40, 60, 80, 90, 100, 120, 140, 160, 180, 200, 220, 240]
+
+
+def read_heights(lzma_file: TextIO) -> np.ndarray:
+    """Reads the header of the STA file up to the altitudes line and returns the
+    measurement heights. Leaves the file positioned one line above the column names."""
+    header_len = int(lzma_file.readline().split("=")[1])
+
+    # locate the altitudes header line
+    for i in range(header_len - 1):
+        header_line = lzma_file.readline()
+
+        if "Altitudes" in header_line:
+            lineinfo = header_line.split("=")
+            altitudes = lineinfo[1].replace("\n", "")
+            return np.fromstring(altitudes, sep="\t", dtype=int)
+
+    return np.array(DEFAULT_HEIGHTS)
+
+
+def read_sta_block(lzma_file: TextIO, heights: np.ndarray) -> xr.Dataset:
+    """Parses the body of an STA file into a dataset, reading the per-height columns
+    as a single (index, height, category) block instead of one variable per column."""
+    lzma_file.readline()  # skip the line above the column names
+    columns = lzma_file.readline().rstrip("\n").split("\t")
+    position = {name: i for i, name in enumerate(columns)}
+
+    # Column indices of each (height, category) pair and of the scalar variables that
+    # precede the per-height columns
+    block_columns = np.array(
+        [[position[f"{height}m {c}"] for c in RAW_CATEGORIES] for height in heights]
+    )
+    scalar_columns = [
+        i for i, name in enumerate(columns[1 : block_columns.min()], start=1) if name
+    ]
+    data_columns = np.array(sorted([*scalar_columns, *block_columns.ravel()]))
+
+    # Only the needed columns are parsed, with the timestamp column kept as strings
+    df = pd.read_csv(
+        lzma_file,
+        sep="\t",
+        header=None,
+        usecols=[0, *data_columns],
+        dtype={i: float for i in data_columns},
+    )
+    timestamps = df.pop(0).to_numpy()
+    matrix = df.to_numpy(dtype=float)
+
+    # Per-height columns are stored height by height with the categories in the same
+    # order, so the block is a reshape of the matrix. Otherwise gather them by index.
+    block_positions = np.searchsorted(data_columns, block_columns)
+    n_time, (n_height, n_category) = len(matrix), block_positions.shape
+    if (np.diff(block_positions.ravel()) == 1).all():
+        start = block_positions[0, 0]
+        block = matrix[:, start : start + n_height * n_category].reshape(
+            n_time, n_height, n_category
+        )
+    else:
+        block = matrix[:, block_positions]
+
+    scalar_positions = np.searchsorted(data_columns, scalar_columns)
+    data_vars = {"Timestamp (end of interval)": ("index", timestamps)}
+    for i, pos in zip(scalar_columns, scalar_positions):
+        data_vars[columns[i]] = ("index", matrix[:, pos])
+    for k, output_name in enumerate(OUTPUT_VAR_NAMES):
+        data_vars[output_name] = (("index", "height"), block[:, :, k])
+
+    return xr.Dataset(
+        data_vars, coords={"index": np.arange(n_time), "height": heights}
+    )
+
+
 class STADataReader(DataReader):
     """---------------------------------------------------------------------------------
     Custom DataReader that can be used to read data from a specific format.
@@ -18,6 +116,14 @@ class STADataReader(DataReader):
 
     ---------------------------------------------------------------------------------"""
 
+    class Parameters(BaseModel, extra=Extra.forbid):
+        parser: Literal["numpy", "pandas"] = "numpy"
+        """The method used to parse .sta files. 'numpy' reads the per-height columns
+        straight into one (time, height, category) block; 'pandas' reads a wide
+        DataFrame and restacks the columns of each category."""
+
+    parameters: Parameters = Parameters()
+
     def read(self, input_key: str) -> Union[xr.Dataset, Dict[str, xr.Dataset]]:
         """----------------------------------------------------------------------------
         Method to read data in a custom format and convert it into an xarray Dataset.
@@ -28,23 +134,15 @@ class STADataReader(DataReader):
         Returns:
             xr.Dataset: An xr.Dataset object
         ----------------------------------------------------------------------------"""
-        altitudes = ""
-
         with lzma.open(
             input_key,
             encoding="cp1252",  # Default encoding for Windows devices
             mode="rt",
         ) as lzma_file:
-            header_len = int(lzma_file.readline().split("=")[1])
+            heights = read_heights(lzma_file)
 
-            # locate the altitudes header line
-            for i in range(header_len - 1):
-                header_line = lzma_file.readline()
-
-                if "Altitudes" in header_line:
-                    lineinfo = header_line.split("=")
-                    altitudes = lineinfo[1].replace("\n", "")
-                    break
+            if self.parameters.parser == "numpy" and ".sta" in input_key:
+                return read_sta_block(lzma_file, heights)
 
             df = pd.read_csv(
                 lzma_file,
@@ -54,45 +152,12 @@ class STADataReader(DataReader):
             )
 
         dataset = df.to_xarray()
-
-        if altitudes != "":
-            dataset["height"] = xr.DataArray(
-                data=np.fromstring(altitudes, sep="\t", dtype=int), dims="height"
-            )
-        else:
-            # if we didn't find the altitudes in the input file, we can attempt to hard code the values
-            dataset["height"] = xr.DataArray(
-                data=[40, 60, 80, 90, 100, 120, 140, 160, 180, 200, 220, 240], dims="height"
-            )
+        dataset["height"] = xr.DataArray(data=heights, dims="height")
 
         # Compress row of variables in input into variables dimensioned by time and height
         if ".sta" in input_key:
-            raw_categories = [
-                "Wind Speed (m/s)",
-                "Wind Speed Dispersion (m/s)",
-                "Wind Speed min (m/s)",
-                "Wind Speed max (m/s)",
-                "Wind Direction (°)",
-                "Z-wind (m/s)",
-                "Z-wind Dispersion (m/s)",
-                "CNR (dB)",
-                "Dopp Spect Broad (m/s)",
-                "Data Availability (%)",
-            ]
-            output_var_names = [
-                "wind_speed",
-                "horizontal_dispersion",
-                "min_wind_speed",
-                "max_wind_speed",
-                "wind_direction",
-                "vertical_wind_speed",
-                "vertical_dispersion",
-                "carrier_noise_ratio",
-                "doppler_spectral_broadening",
-                "data_availability",
-            ]
             heights = dataset.height.data
-            for category, output_name in zip(raw_categories, output_var_names):
+            for category, output_name in zip(RAW_CATEGORIES, OUTPUT_VAR_NAMES):
                 var_names = [f"{height}m {category}" for height in heights]
                 var_data = [dataset[name].data for name in var_names]
                 dataset = dataset.drop_vars(var_names)
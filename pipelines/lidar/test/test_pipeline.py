@@ -2,6 +2,8 @@ import xarray as xr
 from pathlib import Path
 from tsdat import PipelineConfig, assert_close
 
+from pipelines.lidar.readers import STADataReader
+
 
 def test_lidar_morro():
     config_path = Path("pipelines/lidar/config/pipeline_morro.yaml")
@@ -27,3 +29,13 @@ def test_lidar_humboldt():
     dataset = pipeline.run([test_file])
     expected: xr.Dataset = xr.open_dataset(expected_file)  # type: ignore
     assert_close(dataset, expected, check_attrs=False)
+
+
+def test_sta_parsers_match():
+    test_file = "pipelines/lidar/test/data/input/lidar.z06.00.20201201.000000.sta.7z"
+
+    expected = STADataReader(parameters={"parser": "pandas"}).read(test_file)
+    dataset = STADataReader(parameters={"parser": "numpy"}).read(test_file)
+    for name in dataset.variables:
+        variable = dataset[name]
+        xr.testing.assert_equal(variable, expected[name].astype(variable.dtype))
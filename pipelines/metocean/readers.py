@@ -1,7 +1,85 @@
+import csv
+import functools
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
+from zipfile import ZipFile
+
 import numpy as np
 import pandas as pd
 import xarray as xr
+import yaml
+from pydantic import BaseModel, Extra, Field
 from tsdat import DataReader
+from tsdat.io.readers import ZipReader
+
+_VEL_COLUMN_REGEX = re.compile(r"^Vel(\d+) \(mm/s\)$")
+_DIR_COLUMN_REGEX = re.compile(r"^Dir(\d+) \(deg\)$")
+_ADCP_COLUMN_REGEX = re.compile(r"^(Vel\d+ \(mm/s\)|Dir\d+ \(deg\))$")
+
+
+def _get_adcp_columns(columns: Iterable[str]) -> Tuple[List[str], List[str]]:
+    """Returns the names of the ADCP velocity and direction columns for bins 1 to N,
+    where N is the last bin before the first one missing either column."""
+    vel_columns: Dict[int, str] = {}
+    dir_columns: Dict[int, str] = {}
+    for column in columns:
+        vel_match = _VEL_COLUMN_REGEX.match(column)
+        dir_match = _DIR_COLUMN_REGEX.match(column)
+        if vel_match:
+            vel_columns[int(vel_match[1])] = column
+        elif dir_match:
+            dir_columns[int(dir_match[1])] = column
+
+    n_bins = 0
+    while n_bins + 1 in vel_columns and n_bins + 1 in dir_columns:
+        n_bins += 1
+    bins = range(1, n_bins + 1)
+    return [vel_columns[i] for i in bins], [dir_columns[i] for i in bins]
+
+
+# Columns used to compute the depth of each ADCP bin
+_ADCP_DEPTH_COLUMNS = {"BinSpacing", "HeadDepth", "BlankingDistance"}
+
+# Variables the reader creates from the ADCP columns
+_ADCP_VARIABLES = {"current_speed", "current_direction", "depth"}
+
+
+@functools.lru_cache(maxsize=8)
+def _get_retrieved_names(
+    retriever_file: Path, mtime_ns: int
+) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    """Returns the names of the input coordinates and data variables that the retriever
+    config maps to output variables, for any input file pattern."""
+    config = yaml.safe_load(retriever_file.read_text(encoding="UTF-8"))
+
+    def get_names(section: Dict[str, Dict[str, dict]]) -> FrozenSet[str]:
+        names = set(section)
+        for retrieval in section.values():
+            if "name" in retrieval:
+                names.add(retrieval["name"])
+            else:  # {pattern: {name: ...}}
+                names.update(v["name"] for v in retrieval.values() if "name" in v)
+        return frozenset(names)
+
+    return get_names(config.get("coords", {})), get_names(config.get("data_vars", {}))
+
+
+def _read_header(input_key) -> List[str]:
+    """Returns the column names from the first line of a csv file or file-like object,
+    leaving file-like objects at the start."""
+    if hasattr(input_key, "readline"):
+        line = input_key.readline()
+        input_key.seek(0)
+    else:
+        with open(input_key, "rb") as file:
+            line = file.readline()
+    if isinstance(line, bytes):
+        line = line.decode("utf-8-sig")
+    return next(csv.reader([line]))
 
 
 class BuoyReader(DataReader):
@@ -12,47 +90,66 @@ class BuoyReader(DataReader):
     [tsdat.io.readers](https://tsdat.readthedocs.io/en/latest/autoapi/tsdat/io/readers)
     module.
 
+    If the `retriever` parameter is set, only the columns that the retriever config
+    maps to output variables are parsed (as float64), the DataTimeStamp column is parsed
+    with `time_format`, and the dataset is built directly from the parsed arrays.
+
     ---------------------------------------------------------------------------------"""
 
+    class Parameters(BaseModel, extra=Extra.forbid):
+        retriever: Optional[Path] = None
+        """Path to the retriever config file whose coords and data_vars mappings
+        determine the columns to read. If None (the default), every column is read."""
+
+        time_format: str = "%Y-%m-%d %H:%M:%S"
+        """The format of the DataTimeStamp column. Timestamps that do not match it are
+        left as strings for the retriever's data converters."""
+
+    parameters: Parameters = Parameters()
+
     def read(self, input_key) -> xr.Dataset:
-        df: pd.DataFrame = pd.read_csv(input_key, index_col=0)  # type: ignore
-        ds = xr.Dataset.from_dataframe(df)
-
-        if "Vel1 (mm/s)" in ds.variables:
-
-            def has_vel_and_dir(index: int) -> bool:
-                has_vel = f"Vel{index+1} (mm/s)" in ds.variables
-                has_dir = f"Dir{index+1} (deg)" in ds.variables
-                return has_vel and has_dir
-
-            # Calculate depths and collect data vars
-            i = 0
-            depth, vel_data, dir_data = [], [], []
-            # Location of first bin from ADCP
-            first_bin = (
-                df["HeadDepth"][0] + df["BlankingDistance"][0] + df["BinSpacing"][0]
-            )  # .85 m instrument depth + 0.5 m blank + 4 m bin size
-            # Create 2D matrix of ADCP data
-            while has_vel_and_dir(i):
-                depth.append(first_bin + 4 * i)
-                vel_data.append(ds[f"Vel{i+1} (mm/s)"].data)
-                dir_data.append(ds[f"Dir{i+1} (deg)"].data)
-                i += 1
-
-            depth = np.array(depth)  # type: ignore
-            vel_data = np.array(vel_data).T  # type: ignore
-            dir_data = np.array(dir_data).T  # type: ignore
-
-            # Make depth coordinate variables
+        if self.parameters.retriever is None:
+            df: pd.DataFrame = pd.read_csv(input_key, index_col=0)  # type: ignore
+        else:
+            index_name, index, df = self._read_retrieved_columns(input_key)
+        vel_columns, dir_columns = _get_adcp_columns(df.columns)
+        n_bins = len(vel_columns)
+
+        adcp_columns = [c for pair in zip(vel_columns, dir_columns) for c in pair]
+
+        # Drop the per-bin columns so only the 2D arrays are carried through
+        raw_columns = [c for c in df.columns if _ADCP_COLUMN_REGEX.match(c)]
+        if self.parameters.retriever is None:
+            ds = xr.Dataset.from_dataframe(
+                df.drop(columns=raw_columns) if raw_columns else df
+            )
+        else:
+            ds = xr.Dataset(
+                {
+                    name: (index_name, df[name].to_numpy())
+                    for name in df.columns.difference(raw_columns, sort=False)
+                },
+                coords={index_name: index},
+            )
+
+        if n_bins:
+            # Location of first bin from ADCP, e.g., .85 m instrument depth + 0.5 m
+            # blank + 4 m bin size
+            spacing = df["BinSpacing"].iloc[0]
+            head_depth = df["HeadDepth"].iloc[0]
+            first_bin = head_depth + df["BlankingDistance"].iloc[0] + spacing
+            depth = first_bin + spacing * np.arange(n_bins)
+
+            # The columns were selected as Vel1, Dir1, Vel2, Dir2, ..., so a single
+            # reshape gives (time, depth, [speed, direction])
+            data = df[adcp_columns].to_numpy().reshape(len(df), n_bins, 2)
+
             ds["depth"] = xr.DataArray(data=depth, dims=["depth"])
             ds = ds.set_coords("depth")
-
-            # Add current velocity and direction data to dataset
-            ds["current_speed"] = xr.DataArray(data=vel_data, dims=["time", "depth"])
+            ds["current_speed"] = xr.DataArray(data[..., 0], dims=["time", "depth"])
             ds["current_direction"] = xr.DataArray(
-                data=dir_data, dims=["time", "depth"]
+                data[..., 1], dims=["time", "depth"]
             )
-            # TODO: drop vel/dir data
 
         # Hack if currents file is missing
         if "depth" not in ds:
@@ -63,3 +160,92 @@ class BuoyReader(DataReader):
             )
 
         return ds
+
+    def _read_retrieved_columns(
+        self, input_key
+    ) -> Tuple[str, np.ndarray, pd.DataFrame]:
+        """Returns the name and parsed values of the index column and the retrieved
+        data columns."""
+        retriever = Path(self.parameters.retriever)  # type: ignore
+        coord_names, var_names = _get_retrieved_names(
+            retriever, retriever.stat().st_mtime_ns
+        )
+        with_adcp = not _ADCP_VARIABLES.isdisjoint(var_names)
+
+        def is_used(column: str) -> bool:
+            if column in coord_names or column in var_names:
+                return True
+            return with_adcp and (
+                column in _ADCP_DEPTH_COLUMNS or bool(_ADCP_COLUMN_REGEX.match(column))
+            )
+
+        # The first column is the index, as when every column is read
+        header = _read_header(input_key)
+        index_name, columns = header[0], [c for c in header[1:] if is_used(c)]
+        df = pd.read_csv(
+            input_key,
+            usecols=[index_name, *columns],
+            dtype={index_name: str, **{c: np.float64 for c in columns}},
+            engine="c",
+        )
+        index = df.pop(index_name).to_numpy()
+        try:
+            index = pd.to_datetime(index, format=self.parameters.time_format).to_numpy()
+        except ValueError:
+            pass
+        return index_name, index, df
+
+
+class ThreadedZipReader(ZipReader):
+    """---------------------------------------------------------------------------------
+    ZipReader that reads the members of the archive concurrently in a pool of threads.
+    Decompressing and parsing the csv files is mostly done in zlib and pandas C code
+    that releases the GIL, so the members are read in parallel. The output is the same
+    as ZipReader's.
+
+    ---------------------------------------------------------------------------------"""
+
+    class Parameters(ZipReader.Parameters, extra=Extra.forbid):
+        max_workers: Optional[int] = Field(None, ge=1)
+        """The maximum number of threads. If 1, the members are read one at a time,
+        like ZipReader. Defaults to None (one thread per member, up to the number of
+        CPUs)."""
+
+    parameters: Parameters = Parameters()
+
+    def read(self, input_key: Union[str, BytesIO]) -> Dict[str, xr.Dataset]:
+        if isinstance(input_key, str):
+            open_kwargs = {"mode": "rb", **self.parameters.open_zip_kwargs}
+            with open(input_key, **open_kwargs) as file:
+                return self._read_archive(file)
+        return self._read_archive(input_key)
+
+    def _read_archive(self, file) -> Dict[str, xr.Dataset]:
+        with ZipFile(file, **self.parameters.read_zip_kwargs) as archive:
+            # Like ZipReader, every reader is used to read every member not excluded
+            tasks = [
+                (filename, reader)
+                for filename in archive.namelist()
+                if not re.match(self.parameters.exclude, filename)  # type: ignore
+                for reader in self.parameters.readers.values()
+                if reader
+            ]
+            workers = self.parameters.max_workers or min(
+                len(tasks), os.cpu_count() or 1
+            )
+
+            def read_member(filename: str, reader: DataReader):
+                data = reader.read(BytesIO(archive.read(filename)))  # type: ignore
+                return {filename: data} if isinstance(data, xr.Dataset) else data
+
+            output: Dict[str, xr.Dataset] = {}
+            if workers <= 1:
+                for filename, reader in tasks:
+                    output.update(read_member(filename, reader))
+                return output
+
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(read_member, *task) for task in tasks]
+                for future in futures:  # Merged in order, as ZipReader does
+                    output.update(future.result())
+            return output
@@ -1,7 +1,13 @@
+from io import BytesIO, StringIO
 from pathlib import Path
+from zipfile import ZipFile
 
+import numpy as np
 import xarray as xr
 from tsdat import PipelineConfig, assert_close
+from tsdat.io.readers import ZipReader
+
+from pipelines.metocean.readers import BuoyReader, ThreadedZipReader
 
 
 # Test missing current file
@@ -59,3 +65,73 @@ def test_metocean_oahu():
     dataset = pipeline.run(test_files)
     expected = xr.open_dataset("pipelines/metocean/test/data/expected/oahu.buoy.z07.a0.20230801.000000.10m.nc")  # type: ignore
     assert_close(dataset, expected, check_attrs=False)
+
+
+def test_buoy_reader_adcp_bins():
+    csv = StringIO(
+        "DataTimeStamp,BinSpacing,HeadDepth,BlankingDistance,"
+        "Vel1 (mm/s),Dir1 (deg),Vel2 (mm/s),Dir2 (deg),Vel4 (mm/s),Dir4 (deg)\n"
+        "2020-12-01 00:00:00,2.0,1.0,0.5,10,90,20,180,30,270\n"
+        "2020-12-01 00:10:00,2.0,1.0,0.5,11,91,21,181,31,271\n"
+    )
+    dataset = BuoyReader().read(csv)  # type: ignore
+
+    # Bins stop at the first gap (bin 3); the raw columns are dropped
+    np.testing.assert_array_equal(dataset["depth"], [3.5, 5.5])
+    np.testing.assert_array_equal(dataset["current_speed"], [[10, 20], [11, 21]])
+    np.testing.assert_array_equal(dataset["current_direction"], [[90, 180], [91, 181]])
+    assert not [v for v in dataset.data_vars if str(v).startswith(("Vel", "Dir"))]
+
+
+def test_buoy_reader_retrieved_columns(tmp_path: Path):
+    retriever = tmp_path / "retriever.yaml"
+    retriever.write_text(
+        "coords:\n"
+        "  time:\n"
+        "    name: DataTimeStamp\n"
+        "data_vars:\n"
+        "  air_temperature:\n"
+        "    .*temperature\\.csv:\n"
+        "      name: Temperature (C)\n"
+    )
+    text = (
+        "DataTimeStamp,Temperature (C),Unused\n"
+        "2020-12-01 00:00:00,15.5,1\n"
+        "2020-12-01 00:10:00,15.25,2\n"
+    )
+    reader = BuoyReader(parameters={"retriever": retriever})  # type: ignore
+    dataset = reader.read(StringIO(text))  # type: ignore
+
+    assert list(dataset.data_vars) == ["Temperature (C)"]
+    np.testing.assert_array_equal(
+        dataset["DataTimeStamp"],
+        np.array(["2020-12-01T00:00", "2020-12-01T00:10"], dtype="datetime64[ns]"),
+    )
+    expected = BuoyReader().read(StringIO(text))  # type: ignore
+    xr.testing.assert_identical(
+        dataset["Temperature (C)"].drop_vars("DataTimeStamp"),
+        expected["Temperature (C)"].drop_vars("DataTimeStamp"),
+    )
+
+
+def test_threaded_zip_reader_matches_zip_reader():
+    archive = BytesIO()
+    with ZipFile(archive, "w") as zip_file:
+        for i in range(4):
+            zip_file.writestr(
+                f"buoy.z05.00.20201201.00000{i}.rh.csv",
+                f"DataTimeStamp,RH (%)\n2020-12-01 00:00:00,{i}\n",
+            )
+        zip_file.writestr("__MACOSX/buoy.z05.00.20201201.000000.rh.csv", "")
+
+    readers = {r".*\.csv": BuoyReader()}
+    expected = ZipReader(parameters={"readers": readers}).read(archive)  # type: ignore
+    for max_workers in (1, 3):
+        archive.seek(0)
+        reader = ThreadedZipReader(
+            parameters={"readers": readers, "max_workers": max_workers}
+        )
+        data = reader.read(archive)
+        assert list(data) == list(expected)
+        for name in data:
+            xr.testing.assert_identical(data[name], expected[name])
@@ -1,10 +1,14 @@
 import logging
+import sys
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 import typer
 
-from utils.registry import PipelineRegistry
+from utils.manifest import Manifest
+from utils.profiling import profile_imports
+from utils.registry import PipelineRegistry, PlotMode
+from utils.watcher import DirectoryWatcher
 
 
 logger = logging.getLogger(__name__)
@@ -12,7 +16,39 @@ logger = logging.getLogger(__name__)
 app = typer.Typer(add_completion=False)
 
 
-@app.command()
+def plots_option() -> Optional[PlotMode]:
+    return typer.Option(
+        None,
+        case_sensitive=False,
+        help="When to create plots: 'inline' right after each dataset is saved,"
+        " 'deferred' in separate worker processes while other files are processed, or"
+        " 'off'. Defaults to the 'plots' parameter in each pipeline config file, or"
+        " 'inline' if it is not set.",
+    )
+
+
+def plot_workers_option() -> int:
+    return typer.Option(
+        1, min=1, help="Number of worker processes used to create deferred plots."
+    )
+
+
+def setup_logging(verbose: bool):
+    # If in verbose mode, then turn up logging to DEBUG
+    if verbose:
+        logging.basicConfig(level=logging.DEBUG)
+    else:
+        logging.basicConfig(level=logging.INFO)
+
+
+def rerun_with_import_profiling() -> int:
+    # Imports happen before options are parsed, so the command is run again in a new
+    # interpreter with import timing turned on
+    args = [arg for arg in sys.argv if arg != "--profile-startup"]
+    return profile_imports(args)
+
+
+@app.command("run")
 def run_pipeline(
     filepaths: List[Path] = typer.Argument(
         ...,
@@ -29,27 +65,163 @@ def run_pipeline(
         " results in one output data file being produced. Omit this option to run files"
         " independently and generally produce one output data file for each input file.",
     ),
+    group: bool = typer.Option(
+        False,
+        help="Group files by pipeline, buoy, and time window (parsed from names like"
+        " buoy.z07.00.20230801.000000.gps.csv) and run each group as a single clumped"
+        " ingest. Ignored if --clump is used.",
+    ),
+    group_window: int = typer.Option(
+        0,
+        min=0,
+        help="Length in seconds of the time windows used by --group. If 0, only files"
+        " with identical timestamps are grouped.",
+    ),
+    force: bool = typer.Option(
+        False,
+        help="Process files again even if the manifest shows that they, the pipeline"
+        " configs, and the pipeline code are unchanged since they were last processed.",
+    ),
+    manifest: bool = typer.Option(
+        True,
+        help="Record processed files in the manifest and skip unchanged files.",
+    ),
+    manifest_path: Path = typer.Option(
+        Path(".cache/manifest.sqlite"),
+        help="Path to the SQLite manifest of processed files.",
+    ),
+    workers: int = typer.Option(
+        1,
+        min=1,
+        help="Number of worker processes used to run independent input files"
+        " concurrently. Logs from each run are printed together once the run finishes."
+        " Ignored if --clump is used.",
+    ),
+    plots: Optional[PlotMode] = plots_option(),
+    plot_workers: int = plot_workers_option(),
     verbose: bool = typer.Option(False, help="Turn logging level up to DEBUG."),
+    profile_startup: bool = typer.Option(
+        False,
+        help="Report how long each package and module took to import.",
+    ),
     # pipeline: str = typer.Option() # IDEA: Ability to run a specific ingest / folder
 ):
     """Main entry point to the ingest controller. This script takes a path to an input
     file, automatically determines which ingest(s) to use, and runs those ingests on the
     provided input data."""
 
-    # If in verbose mode, then turn up logging to DEBUG
-    if verbose:
-        logging.basicConfig(level=logging.DEBUG)
-    else:
-        logging.basicConfig(level=logging.INFO)
+    if profile_startup:
+        raise typer.Exit(rerun_with_import_profiling())
+
+    setup_logging(verbose)
 
     # Downstream code expects a list of strings
     files = [str(file) for file in filepaths]
     logger.debug(f"Found input files: {files}")
 
     # Run the pipeline on the input files
-    dispatcher = PipelineRegistry()
-    dispatcher.dispatch(files, clump=clump)
+    dispatcher = PipelineRegistry(
+        Manifest(manifest_path) if manifest else None,
+        plots=plots,
+        plot_workers=plot_workers,
+    )
+    dispatcher.dispatch(
+        files,
+        clump=clump,
+        workers=workers,
+        group=group,
+        group_window=group_window,
+        force=force,
+    )
+
+
+@app.command()
+def watch(
+    folder: Path = typer.Argument(
+        ...,
+        exists=True,
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+        help="Path to the folder where new input files arrive",
+    ),
+    pattern: str = typer.Option(
+        "**/*",
+        help="Glob pattern (relative to the folder) of the files to watch.",
+    ),
+    poll_interval: float = typer.Option(
+        1.0, min=0.1, help="Seconds between scans of the folder."
+    ),
+    settle_time: float = typer.Option(
+        2.0,
+        min=0,
+        help="Seconds a file's size and modification time must stay the same before"
+        " it is processed. Increase this if files are written slowly.",
+    ),
+    max_queued: int = typer.Option(
+        100,
+        min=1,
+        help="Maximum number of files waiting to be processed. Scanning pauses while"
+        " the queue is full.",
+    ),
+    workers: int = typer.Option(
+        1, min=1, help="Number of worker processes used to run queued files."
+    ),
+    max_retries: int = typer.Option(
+        3,
+        min=0,
+        help="Number of times a file whose pipeline run failed is processed again"
+        " before it is skipped until it is modified.",
+    ),
+    skip_existing: bool = typer.Option(
+        False, help="Ignore files already in the folder when the watcher starts."
+    ),
+    manifest: bool = typer.Option(
+        True,
+        help="Record processed files in the manifest and skip unchanged files.",
+    ),
+    manifest_path: Path = typer.Option(
+        Path(".cache/manifest.sqlite"),
+        help="Path to the SQLite manifest of processed files.",
+    ),
+    plots: Optional[PlotMode] = plots_option(),
+    plot_workers: int = plot_workers_option(),
+    verbose: bool = typer.Option(False, help="Turn logging level up to DEBUG."),
+    profile_startup: bool = typer.Option(
+        False,
+        help="Report how long each package and module took to import.",
+    ),
+):
+    """Long-running ingest controller. This watches a folder and runs the matching
+    ingest(s) on each new or modified file once it has finished being written. The
+    pipelines are loaded once and kept in memory between files. Press Ctrl+C to stop."""
+
+    if profile_startup:
+        raise typer.Exit(rerun_with_import_profiling())
+
+    setup_logging(verbose)
+
+    watcher = DirectoryWatcher(
+        PipelineRegistry(
+            Manifest(manifest_path) if manifest else None,
+            plots=plots,
+            plot_workers=plot_workers,
+        ),
+        folder,
+        pattern=pattern,
+        poll_interval=poll_interval,
+        settle_time=settle_time,
+        max_queued=max_queued,
+        workers=workers,
+        max_retries=max_retries,
+        skip_existing=skip_existing,
+    )
+    watcher.run()
 
 
 if __name__ == "__main__":
+    # Running `python runner.py <files>` without a command name is the same as
+    # `python runner.py run <files>`
+    if len(sys.argv) > 1 and sys.argv[1] not in ("run", "watch", "--help"):
+        sys.argv.insert(1, "run")
     app()
@@ -0,0 +1,153 @@
+import os
+from pathlib import Path
+from typing import Any, ClassVar, Dict, Tuple
+
+import numpy as np
+import xarray as xr
+from tsdat import DataReader
+
+from pipelines.metocean.readers import BuoyReader
+from utils import CachedReader, InputCache
+from utils.cache import reader_version
+
+
+def test_input_cache_lru_eviction(tmp_path):
+    cache = InputCache(tmp_path, max_size=2500)
+    for i, key in enumerate(["a", "b", "c"]):
+        cache.put(key, b"x" * 1000)
+        os.utime(tmp_path / f"{key}.pkl", (i, i))
+
+    # Only two entries fit; reading 'b' makes 'c' the least recently used one
+    assert cache.get("a") is None
+    assert cache.get("b") == b"x" * 1000
+    os.utime(tmp_path / "c.pkl", (0, 0))
+    cache.put("d", b"x" * 1000)
+    assert sorted(p.stem for p in tmp_path.glob("*.pkl")) == ["b", "d"]
+
+
+def test_input_cache_key(tmp_path):
+    path = tmp_path / "input.zip"
+    path.write_bytes(b"raw data")
+    cache = InputCache(tmp_path / "cache", max_size=1000)
+    assert cache.key(str(path), "v1") == cache.key(str(path), "v1")
+    assert cache.key(str(path), "v1") != cache.key(str(path), "v2")
+
+
+class CountingReader(DataReader):
+    """Reads a file of whitespace-separated numbers and counts the files it reads."""
+
+    parameters: Dict[str, Any] = {}
+    reads: ClassVar[int] = 0
+
+    def read(self, input_key: str) -> xr.Dataset:
+        CountingReader.reads += 1
+        values = np.loadtxt(input_key, ndmin=1) * self.parameters.get("scale", 1)
+        return xr.Dataset({"values": ("index", values)})
+
+
+def make_cached_reader(tmp_path: Path, **parameters: Any) -> CachedReader:
+    return CachedReader(
+        parameters={  # type: ignore
+            "reader": CountingReader(parameters=parameters.pop("reader", {})),
+            "cache_dir": tmp_path / "cache",
+            **parameters,
+        }
+    )
+
+
+def read_counted(reader: CachedReader, input_key: Path) -> Tuple[xr.Dataset, int]:
+    """Returns the data read and the number of times the wrapped reader was called."""
+    reads = CountingReader.reads
+    dataset = reader.read(str(input_key))
+    return dataset, CountingReader.reads - reads
+
+
+def test_cached_reader_hit_and_content_change(tmp_path: Path):
+    input_file = tmp_path / "input.txt"
+    input_file.write_text("1 2 3")
+    reader = make_cached_reader(tmp_path)
+
+    dataset, reads = read_counted(reader, input_file)
+    assert reads == 1
+    cached, reads = read_counted(reader, input_file)
+    assert reads == 0
+    xr.testing.assert_identical(cached, dataset)
+
+    # Same size and timestamps, different contents
+    stat = input_file.stat()
+    input_file.write_text("4 5 6")
+    os.utime(input_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    dataset, reads = read_counted(reader, input_file)
+    assert reads == 1
+    np.testing.assert_array_equal(dataset["values"], [4, 5, 6])
+
+
+def test_cached_reader_version_change(tmp_path: Path):
+    input_file = tmp_path / "input.txt"
+    input_file.write_text("1 2 3")
+    assert read_counted(make_cached_reader(tmp_path), input_file)[1] == 1
+
+    # Changing the cache version or the wrapped reader's parameters is a miss
+    reader = make_cached_reader(tmp_path, version="2")
+    assert read_counted(reader, input_file)[1] == 1
+    assert read_counted(reader, input_file)[1] == 0
+    reader = make_cached_reader(tmp_path, reader={"scale": 10})
+    dataset, reads = read_counted(reader, input_file)
+    assert reads == 1
+    np.testing.assert_array_equal(dataset["values"], [10, 20, 30])
+    assert len(list((tmp_path / "cache").glob("*.pkl"))) == 3
+
+
+def test_cached_reader_lru_eviction(tmp_path: Path):
+    input_files = []
+    for i in range(3):
+        input_files.append(tmp_path / f"input{i}.txt")
+        input_files[-1].write_text(" ".join([str(i)] * 10000))
+    reader = make_cached_reader(tmp_path)
+    read_counted(reader, input_files[0])
+    entry_size = next((tmp_path / "cache").glob("*.pkl")).stat().st_size
+
+    # Only two entries fit; reading input0 again makes input1 the least recently used
+    reader = make_cached_reader(tmp_path, max_size_mb=2.5 * entry_size / 1024**2)
+    cache = InputCache(tmp_path / "cache", max_size=0)
+    version = reader_version(reader.parameters.reader)
+    entries = [
+        tmp_path / "cache" / f"{cache.key(str(path), version)}.pkl"
+        for path in input_files
+    ]
+    read_counted(reader, input_files[1])
+    for i in (0, 1):
+        os.utime(entries[i], (i, i))
+    assert read_counted(reader, input_files[0])[1] == 0
+    assert read_counted(reader, input_files[2])[1] == 1
+    remaining = sorted((tmp_path / "cache").glob("*.pkl"))
+    assert remaining == sorted([entries[0], entries[2]])
+    assert read_counted(reader, input_files[1])[1] == 1
+
+
+def test_cached_reader_invalidated_by_retriever_change(tmp_path):
+    retriever = tmp_path / "retriever.yaml"
+    mapping = "  {var}:\n    .*temperature\\.csv:\n      name: {name}\n"
+    config = "coords:\n  time:\n    name: DataTimeStamp\ndata_vars:\n"
+    retriever.write_text(config + mapping.format(var="air_temperature", name="Temp"))
+    input_file = tmp_path / "buoy.temperature.csv"
+    input_file.write_text(
+        "DataTimeStamp,Temp,Humidity\n2020-12-01 00:00:00,15.5,80\n"
+    )
+    reader = CachedReader(
+        parameters={  # type: ignore
+            "reader": BuoyReader(parameters={"retriever": retriever}),  # type: ignore
+            "cache_dir": tmp_path / "cache",
+        }
+    )
+    assert list(reader.read(str(input_file)).data_vars) == ["Temp"]
+
+    # Mapping another column in the retriever config must not reuse the cached data
+    retriever.write_text(
+        config
+        + mapping.format(var="air_temperature", name="Temp")
+        + mapping.format(var="humidity", name="Humidity")
+    )
+    os.utime(retriever, ns=(0, 0))  # So the reader doesn't reuse the parsed config
+    assert list(reader.read(str(input_file)).data_vars) == ["Temp", "Humidity"]
+    assert len(list((tmp_path / "cache").glob("*.pkl"))) == 2
@@ -0,0 +1,69 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+from tsdat import DatasetConfig, StringToDatetime
+
+from utils import FastStringToDatetime
+
+DATASET_CONFIG = DatasetConfig.from_yaml(Path("pipelines/waves/config/dataset.yaml"))
+
+
+def convert(converter: StringToDatetime, strings: list) -> xr.DataArray:
+    data = xr.DataArray(np.array(strings, dtype=object), dims=["time"])
+    converted = converter.convert(data, "time", DATASET_CONFIG, None)  # type: ignore
+    assert converted is not None
+    return converted
+
+
+@pytest.mark.parametrize(
+    "format",
+    [
+        "%Y-%m-%d %H:%M:%S",  # passed to pandas' ISO 8601 parser
+        "%m/%d/%Y %H:%M:%S",
+        "%Y%m%d%H%M",
+        "%d.%m.%Y",  # repeated strings are parsed once
+    ],
+)
+@pytest.mark.parametrize("timezone", ["UTC", "US/Pacific"])
+def test_fast_string_to_datetime_matches_tsdat(format: str, timezone: str):
+    times = pd.date_range("2020-02-27", periods=2000, freq="7min")
+    strings = [*times.strftime(format), None, np.nan]
+    expected = convert(StringToDatetime(format=format, timezone=timezone), strings)
+    converted = convert(FastStringToDatetime(format=format, timezone=timezone), strings)
+    xr.testing.assert_identical(converted, expected)
+
+
+def test_fast_string_to_datetime_real_timestamps():
+    # The bundled retrievers use ISO formats, which go to pandas; rewrite the waves
+    # timestamps in a compact format so they are parsed by slicing
+    dataset = pd.read_csv(
+        "pipelines/waves/test/data/input/buoy.z05.00.20201201.000000.waves.csv"
+    )
+    times = pd.to_datetime(dataset["DataTimeStamp"], format="%Y-%m-%d %H:%M:%S")
+    strings = list(times.dt.strftime("%Y%m%d%H%M%S"))
+    format = "%Y%m%d%H%M%S"
+    expected = convert(StringToDatetime(format=format, timezone="UTC"), strings)
+    converted = convert(FastStringToDatetime(format=format, timezone="UTC"), strings)
+    xr.testing.assert_identical(converted, expected)
+    np.testing.assert_array_equal(converted, times.to_numpy())
+
+
+def test_fast_string_to_datetime_falls_back_to_strptime():
+    format = "%m/%d/%Y %H:%M:%S"
+    strings = ["02/29/2020 23:59:59", "3/1/2020 1:02:03", "12/31/1500 00:00:00"]
+    converted = convert(FastStringToDatetime(format=format), strings[:2])
+    np.testing.assert_array_equal(
+        converted,
+        np.array(["2020-02-29T23:59:59", "2020-03-01T01:02:03"], "datetime64[s]"),
+    )
+
+    # Invalid strings raise the same errors as tsdat's converter
+    for invalid in (["02/30/2020 00:00:00"], ["01/01/2020 24:00:00"], strings[2:]):
+        with pytest.raises(ValueError) as expected:
+            convert(StringToDatetime(format=format), invalid)
+        with pytest.raises(ValueError) as raised:
+            convert(FastStringToDatetime(format=format), invalid)
+        assert str(raised.value) == str(expected.value)
@@ -0,0 +1,21 @@
+import numpy as np
+
+from utils import gps_to_utc
+
+
+def test_gps_to_utc_leap_seconds():
+    # GPS week 1930 started on 2017-01-01, when GPS time moved from 17 to 18 seconds
+    # ahead of UTC
+    times = gps_to_utc([1930, 1930, 1930], [16.0, 18.0, 18.5])
+    expected = np.array(
+        [
+            "2016-12-31T23:59:59",
+            "2017-01-01T00:00:00",
+            "2017-01-01T00:00:00.5",
+        ],
+        dtype="datetime64[ns]",
+    )
+    np.testing.assert_array_equal(times, expected)
+
+    # No leap seconds before 1981-07-01
+    assert gps_to_utc(0, 0.0) == np.datetime64("1980-01-06T00:00:00")
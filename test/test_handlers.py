@@ -0,0 +1,73 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from utils import ChunkedNetCDFHandler, ChunkedZarrHandler
+
+
+def make_dataset() -> xr.Dataset:
+    return xr.Dataset(
+        {
+            "wind_speed": (("time", "height"), np.random.rand(300, 4)),
+            "location": ((), "humboldt"),
+        },
+        coords={
+            "time": pd.date_range("2022-01-01", periods=300, freq="10min"),
+            "height": [40, 60, 80, 100],
+        },
+    )
+
+
+def test_chunked_netcdf_round_trip(tmp_path: Path):
+    dataset = make_dataset()
+    handler = ChunkedNetCDFHandler(parameters={"chunks": {"time": 144}})
+    filepath = tmp_path / f"test{handler.extension}"
+    handler.writer.write(dataset, filepath)
+
+    written = handler.reader.read(filepath.as_posix())
+    xr.testing.assert_identical(written, dataset)
+    encoding = written["wind_speed"].encoding
+    assert encoding["chunksizes"] == (144, 4)
+    assert encoding["zlib"] and encoding["shuffle"]
+    assert written["time"].encoding["chunksizes"] == (144,)
+
+
+def test_chunked_netcdf_without_compression(tmp_path: Path):
+    dataset = make_dataset()
+    handler = ChunkedNetCDFHandler(
+        parameters={"chunks": {"time": 144}, "compression_level": 0}
+    )
+    filepath = tmp_path / f"test{handler.extension}"
+    handler.writer.write(dataset, filepath)
+
+    written = handler.reader.read(filepath.as_posix())
+    xr.testing.assert_identical(written, dataset)
+    encoding = written["wind_speed"].encoding
+    assert encoding["chunksizes"] == (144, 4)
+    assert not encoding["zlib"]
+
+
+def test_chunked_zarr_round_trip(tmp_path: Path):
+    dataset = make_dataset()
+    dataset["wind_speed"][0, 0] = np.nan
+    handler = ChunkedZarrHandler(parameters={"chunks": {"time": 144}})
+    filepath = tmp_path / f"test{handler.extension}"
+    handler.writer.write(dataset, filepath)
+
+    written = handler.reader.read(filepath.as_posix())
+    xr.testing.assert_identical(written, dataset)
+    encoding = written["wind_speed"].encoding
+    assert encoding["chunks"] == (144, 4)
+    assert encoding["compressor"].cname == "zstd"
+    assert written["time"].encoding["chunks"] == (144,)
+
+    # Chunks are used without compression too
+    handler = ChunkedZarrHandler(
+        parameters={"chunks": {"time": 144}, "compression_level": 0}
+    )
+    handler.writer.write(dataset, filepath)
+    encoding = handler.reader.read(filepath.as_posix())["wind_speed"].encoding
+    assert encoding["chunks"] == (144, 4)
+    assert encoding["compressor"] is None
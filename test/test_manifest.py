@@ -0,0 +1,64 @@
+from pathlib import Path
+
+from utils import Manifest, PipelineRegistry, PlotMode
+
+
+def test_manifest_skips_unchanged_inputs(tmp_path):
+    input_key = "pipelines/waves/test/data/input/buoy.z05.00.20201201.000000.waves.csv"
+    manifest = Manifest(tmp_path / "manifest.sqlite")
+    registry = PipelineRegistry(manifest)
+
+    assert registry.dispatch([input_key]) == (1, 0, 0)
+    config_file = registry._match_input_key(input_key)[0]
+    outputs = manifest.get_outputs(input_key, config_file)
+    assert outputs and all(Path(output).is_file() for output in outputs)
+
+    assert registry.dispatch([input_key]) == (0, 0, 1)
+    assert registry.dispatch([input_key], force=True) == (1, 0, 0)
+
+    # Any change to the input invalidates its record
+    copy = tmp_path / Path(input_key).name
+    copy.write_text(Path(input_key).read_text())
+    assert registry.dispatch([str(copy)]) == (1, 0, 0)
+    copy.write_text(Path(input_key).read_text() + "\n")
+    assert registry.dispatch([str(copy)]) == (1, 0, 0)
+    assert registry.dispatch([str(copy)]) == (0, 0, 1)
+
+
+def test_manifest_reruns_missing_outputs_and_plots(tmp_path):
+    input_key = "pipelines/waves/test/data/input/buoy.z06.00.20201201.000000.waves.csv"
+    manifest = Manifest(tmp_path / "manifest.sqlite")
+    registry = PipelineRegistry(manifest, plots=PlotMode.off)
+    config_file = registry._match_input_key(input_key)[0]
+
+    assert registry.dispatch([input_key]) == (1, 0, 0)
+    assert registry.dispatch([input_key]) == (0, 0, 1)
+
+    # Deleted outputs are written again
+    outputs = manifest.get_outputs(input_key, config_file)
+    output = Path(next(output for output in outputs if output.endswith(".nc")))
+    output.unlink()
+    assert registry.dispatch([input_key]) == (1, 0, 0)
+    assert output.is_file()
+
+    # Inputs processed without plots are processed again once plots are turned on,
+    # but not the other way around
+    registry.plots = PlotMode.inline
+    assert registry.dispatch([input_key]) == (1, 0, 0)
+    assert registry.dispatch([input_key]) == (0, 0, 1)
+    registry.plots = PlotMode.off
+    assert registry.dispatch([input_key]) == (0, 0, 1)
+
+
+def test_manifest_records_every_chunk(tmp_path):
+    input_key = "pipelines/imu/test/data/input/buoy.z07.00.20221123.213000.imu.bin"
+    manifest = Manifest(tmp_path / "manifest.sqlite")
+    registry = PipelineRegistry(manifest, plots=PlotMode.off)
+    config_file = registry._match_input_key(input_key)[0]
+    pipeline = registry._get_pipeline(config_file)
+    reader = next(iter(pipeline.retriever.readers.values()))
+    reader.parameters.chunk_size = 4000
+
+    assert registry.dispatch([input_key]) == (1, 0, 0)
+    outputs = manifest.get_outputs(input_key, config_file)
+    assert len([output for output in outputs if output.endswith(".nc")]) == 4
@@ -0,0 +1,105 @@
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from utils import bin_time, decimate_minmax, plot_histogram, plotting, render_figures
+
+
+def plot_line(dataset: xr.Dataset, label: str):
+    import matplotlib
+    import matplotlib.pyplot as plt
+
+    assert matplotlib.get_backend().lower() == "agg"
+    fig, ax = plt.subplots()
+    dataset.value.plot(ax=ax, label=label)
+    return fig
+
+
+def render_test_figures(folder: Path, workers: int):
+    folder.mkdir(exist_ok=True)
+    dataset = xr.Dataset(
+        {"value": ("time", np.arange(10.0))},
+        coords={"time": pd.date_range("2022-01-01", periods=10, freq="1min")},
+        attrs={"datastream": "test.plots.a1"},
+    )
+    render_figures(
+        {"first": plot_line, "second": plot_line},
+        dataset,
+        folder,
+        workers=workers,
+        label="value",
+    )
+    assert sorted(p.name for p in folder.iterdir()) == [
+        "test.plots.a1.20220101.000000.first.png",
+        "test.plots.a1.20220101.000000.second.png",
+    ]
+
+
+def render_in_worker(folder: Path) -> bool:
+    """Renders figures in a worker process and returns whether it started a pool."""
+    plotting._pool = None  # Forked workers inherit the parent's pool object
+    render_test_figures(folder, workers=2)
+    return plotting._pool is not None
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_render_figures(tmp_path: Path, workers: int):
+    render_test_figures(tmp_path, workers)
+
+
+def test_render_figures_pool(tmp_path: Path):
+    # The pool is reused by later calls in the same process
+    render_test_figures(tmp_path / "first", workers=2)
+    pool = plotting._pool
+    render_test_figures(tmp_path / "second", workers=2)
+    assert pool is not None and plotting._pool is pool
+
+    # Worker processes render their figures inline rather than starting another pool
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        assert not executor.submit(render_in_worker, tmp_path / "worker").result()
+
+
+def test_decimate_minmax():
+    values = np.sin(np.arange(10_000) / 50)
+    values[1234] = 10  # spike that must survive decimation
+    values[5000:5100] = np.nan
+    data = xr.DataArray(
+        values,
+        coords={"time": pd.date_range("2022-01-01", periods=10_000, freq="100ms")},
+    )
+
+    decimated = decimate_minmax(data, max_points=500)
+    assert decimated.size <= 500
+    assert float(decimated.max()) == 10
+    assert float(decimated.min()) == float(data.min())
+    assert (np.diff(decimated.time.values) > np.timedelta64(0)).all()
+    assert decimate_minmax(data, max_points=20_000) is data
+
+
+def test_bin_time():
+    data = xr.DataArray(
+        np.arange(30.0).reshape(10, 3),
+        coords={"time": pd.date_range("2022-01-01", periods=10, freq="10min")},
+        dims=("time", "height"),
+    )
+    binned = bin_time(data, max_bins=4)
+    assert binned.sizes == {"time": 4, "height": 3}
+    np.testing.assert_array_equal(binned[0], [3.0, 4.0, 5.0])
+    np.testing.assert_array_equal(binned[-1], [27.0, 28.0, 29.0])  # padded
+    assert bin_time(data, max_bins=10) is data
+
+
+def test_plot_histogram():
+    import matplotlib.pyplot as plt
+
+    values = np.array([0.0, 0.1, 0.9, 1.0, np.nan])
+    fig, ax = plt.subplots()
+    stairs = plot_histogram(ax, values, bins=2)
+    counts, edges = stairs.get_data()[:2]
+    np.testing.assert_array_equal(counts, [2, 2])
+    np.testing.assert_array_equal(edges, [0.0, 0.5, 1.0])
+    plt.close(fig)
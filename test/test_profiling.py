@@ -0,0 +1,18 @@
+from utils import format_import_report, parse_import_time
+
+
+def test_parse_import_time():
+    lines = [
+        "import time: self [us] | cumulative | imported package",
+        "import time:       120 |        120 |     numpy.core",
+        "import time:      1000 |       1120 |   numpy",
+        "INFO:root:Not an import time line",
+    ]
+    timings = [parse_import_time(line) for line in lines]
+    assert timings[0] is None and timings[3] is None
+    assert timings[1] == ("numpy.core", 120, 120, 2)
+    assert timings[2] == ("numpy", 1000, 1120, 1)
+
+    report = format_import_report([timings[1], timings[2]])
+    assert "Total import time: 0.001 s" in report
+    assert "100.0%  numpy" in report
@@ -0,0 +1,53 @@
+import numpy as np
+import xarray as xr
+from tsdat.qc.checkers import CheckMissing, CheckValidMax, CheckValidMin
+from tsdat.qc.handlers import RecordQualityResults, RemoveFailedValues
+
+from utils import CheckMissingAndValidRange, RecordPackedQualityResults
+
+TESTS = [
+    {"bit": 1, "assessment": "bad", "meaning": "Missing"},
+    {"bit": 2, "assessment": "bad", "meaning": "Below valid_min"},
+    {"bit": 3, "assessment": "indeterminate", "meaning": "Above valid_max"},
+]
+
+
+def get_dataset() -> xr.Dataset:
+    return xr.Dataset(
+        {
+            "filled": (
+                ("time", "height"),
+                np.array([[1.0, -9999.0], [np.nan, 5.0], [-3.0, 20.0]]),
+                {"_FillValue": -9999.0, "valid_min": 0, "valid_max": 10},
+            ),
+            "nan_filled": (
+                "time",
+                np.array([1.0, 50.0, -5.0]),
+                {"_FillValue": np.nan, "valid_min": 0, "valid_max": 10},
+            ),
+            "unchecked": ("time", np.array([np.nan, 1.0, 2.0]), {"long_name": "U"}),
+        },
+        coords={"time": [0, 1, 2], "height": [10, 20]},
+    )
+
+
+def test_fused_qc_matches_separate_checks():
+    expected = get_dataset()
+    checkers = [CheckMissing(), CheckValidMin(), CheckValidMax()]
+    for name in expected.data_vars:
+        for checker, test in zip(checkers, TESTS):
+            failures = checker.run(expected, str(name))
+            expected = RemoveFailedValues().run(expected, str(name), failures)
+            handler = RecordQualityResults(parameters=test)
+            expected = handler.run(expected, str(name), failures)
+
+    dataset = get_dataset()
+    checker = CheckMissingAndValidRange()
+    handler = RecordPackedQualityResults(parameters={"tests": TESTS})
+    for name in list(dataset.data_vars):
+        failures = checker.run(dataset, str(name))
+        dataset = handler.run(dataset, str(name), failures)
+
+    xr.testing.assert_identical(dataset, expected)
+    np.testing.assert_array_equal(dataset["qc_filled"], [[0, 3], [3, 0], [2, 4]])
+    np.testing.assert_array_equal(dataset["qc_nan_filled"], [0, 4, 2])
@@ -0,0 +1,168 @@
+import re
+from pathlib import Path
+
+import pytest
+
+from utils import PipelineRegistry, PlotMode
+from utils.registry import _required_literals
+
+
+def test_parallel_dispatch():
+    input_keys = [
+        "pipelines/waves/test/data/input/buoy.z05.00.20201201.000000.waves.csv",
+        "pipelines/imu/test/data/input/buoy.z06.00.20201201.000000.imu.bin",
+        "pipelines/imu/test/data/input/unknown.file",
+    ]
+    registry = PipelineRegistry()
+    assert registry.dispatch(input_keys, workers=2) == (2, 0, 1)
+    assert registry.failed_inputs == []
+
+
+def test_dispatch_failed_inputs(tmp_path: Path):
+    input_key = str(tmp_path / "buoy.z05.00.20201201.000000.imu.bin")
+    Path(input_key).write_bytes(b"not imu data")
+    registry = PipelineRegistry(plots=PlotMode.off)
+    assert registry.dispatch([input_key]) == (0, 1, 0)
+    assert registry.failed_inputs == [input_key]
+
+
+def test_parallel_dispatch_worker_error(caplog):
+    input_key = "pipelines/waves/test/data/input/buoy.z05.00.20201201.000000.waves.csv"
+    registry = PipelineRegistry(plots=PlotMode.off)
+    config_file = registry._match_input_key(input_key)[0]
+
+    # A job that raises in the worker is recorded as failed; the others still run
+    missing = Path("pipelines/missing/pipeline.yaml")
+    jobs = [(missing, [input_key]), (config_file, [input_key])]
+    results = registry._run_parallel(jobs, workers=2)
+    assert results[0] is None
+    assert results[1] and all(Path(output).exists() for output in results[1])
+    assert str(missing) in caplog.text
+
+
+def test_pipeline_cache():
+    registry = PipelineRegistry()
+    config_file = next(iter(registry._cache))
+    pipeline = registry._get_pipeline(config_file)
+    assert registry._get_pipeline(config_file) is pipeline
+
+    # Touching any of the referenced config files invalidates the cached pipeline
+    files = registry._pipelines[config_file].files
+    dataset_file = next(file for file in files if file.name == "dataset.yaml")
+    dataset_file.touch()
+    assert registry._get_pipeline(config_file) is not pipeline
+
+
+def test_trigger_index():
+    registry = PipelineRegistry()
+    assert not registry._unindexed
+    input_keys = [
+        "pipelines/imu/test/data/input/buoy.z05.00.20201201.000000.imu.bin",
+        "pipelines/lidar/test/data/input/lidar.z06.00.20201201.000000.sta.7z",
+        "pipelines/metocean/test/data/input/buoy.z06.00.20201201.000000.zip",
+        "buoy.z07.00.20230801.000000.waves.csv",  # Matches metocean and waves
+        "buoy.z08.00.20230801.000000.imu.bin",
+    ]
+    for input_key in input_keys:
+        expected = [
+            path
+            for path, regex_list in registry._cache.items()
+            if any(regex.match(input_key) for regex in regex_list)
+        ]
+        assert registry._match_input_key(input_key) == expected
+    assert len(registry._match_input_key(input_keys[3])) == 2
+
+    # Lookups only depend on the lengths of the indexed literals
+    registry._cache = {
+        Path(f"pipelines/buoy{i}/pipeline.yaml"): [re.compile(f".*buoy.z{i:04d}.*")]
+        for i in range(2000)
+    }
+    registry._build_trigger_index()
+    assert registry._literal_lengths == [5]
+    assert registry._match_input_key("buoy.z1234.00.20230801.000000.imu.bin") == [
+        Path("pipelines/buoy1234/pipeline.yaml")
+    ]
+
+
+@pytest.mark.parametrize(
+    "pattern, literals",
+    [
+        (r".*buoy\.z05.*\.imu\.bin", ["buoy.z05", ".imu.bin"]),
+        (r".*buoy\x2ez05.*", ["buoy", "z05"]),
+        (r".*buoy\056z05.*", ["buoy", "z05"]),
+        (r".*buoy\0z05.*", ["buoy", "z05"]),
+        (r".*buoy\u002ez05.*", ["buoy", "z05"]),
+        (r".*buoy\U0000002ez05.*", ["buoy", "z05"]),
+        (r".*buoy\N{FULL STOP}z05.*", ["buoy", "z05"]),
+        (r"(buoy)\1z05", ["z05"]),
+        (r"\d+buoy\Z", ["buoy"]),
+    ],
+)
+def test_required_literals(pattern: str, literals: list):
+    assert _required_literals(pattern) == literals
+
+
+def test_trigger_index_escapes():
+    input_key = "buoy.z05.00.20201201.000000.imu.bin"
+    registry = PipelineRegistry()
+    patterns = [r".*buoy\x2ez05.*", r".*buoy\N{FULL STOP}z05.*", r".*buoy\056z05.*"]
+    patterns += [f".*buoy.z{i:04d}.*" for i in range(100)]  # So the index is used
+    registry._cache = {
+        Path(f"pipelines/escape{i}/pipeline.yaml"): [re.compile(pattern)]
+        for i, pattern in enumerate(patterns)
+    }
+    registry._build_trigger_index()
+    assert registry._match_input_key(input_key) == list(registry._cache)[:3]
+
+
+def test_grouped_dispatch():
+    input_keys = sorted(
+        path.as_posix()
+        for path in Path("pipelines/metocean/test/data/input/oahu").glob("*.csv")
+    ) + ["pipelines/waves/test/data/input/buoy.z05.00.20201201.000000.waves.csv"]
+    registry = PipelineRegistry()
+
+    jobs, skipped = registry._get_jobs(input_keys, multidispatch=False, group=True)
+    assert skipped == 0
+    assert [len(inputs) for _, inputs in jobs] == [10, 1]
+
+    assert registry.dispatch(input_keys, group=True) == (2, 0, 0)
+
+
+def test_plot_mode_from_pipeline_config(tmp_path: Path):
+    input_key = "pipelines/waves/test/data/input/buoy.z06.00.20201201.000000.waves.csv"
+    registry = PipelineRegistry()
+    config_file = registry._match_input_key(input_key)[0]
+    config = config_file.read_text()
+
+    # Unquoted 'off' is read as False by YAML 1.1
+    off_config = tmp_path / "pipeline_off.yaml"
+    off_config.write_text(config + "\nparameters:\n  plots: off\n")
+    pipeline = registry._get_pipeline(off_config)
+    assert registry._get_plot_mode(pipeline) is PlotMode.off
+    assert registry._run(off_config, [input_key])
+
+    # An invalid plot mode only fails the run that uses it
+    bad_config = tmp_path / "pipeline_bad.yaml"
+    bad_config.write_text(config + "\nparameters:\n  plots: sometimes\n")
+    assert registry._run(bad_config, [input_key]) is None
+
+
+def test_plot_modes():
+    input_key = "pipelines/waves/test/data/input/buoy.z06.00.20201201.000000.waves.csv"
+    registry = PipelineRegistry(plots=PlotMode.off)
+    pipeline = registry._get_pipeline(registry._match_input_key(input_key)[0])
+    plots = Path(
+        pipeline.storage.parameters.storage_root,
+        "ancillary/morro.buoy_z06-waves-20m.a1",
+        "morro.buoy_z06-waves-20m.a1.20201201.000000.wave_height.png",
+    )
+    plots.unlink(missing_ok=True)
+
+    assert registry.dispatch([input_key]) == (1, 0, 0)
+    assert not plots.exists()
+    assert "hook_plot_dataset" in type(pipeline).__dict__  # Restored after the run
+
+    registry.plots = PlotMode.deferred
+    assert registry.dispatch([input_key]) == (1, 0, 0)
+    assert plots.exists()
@@ -0,0 +1,127 @@
+import shutil
+import threading
+import time
+from pathlib import Path
+
+from utils import DirectoryWatcher, Manifest, PipelineRegistry, PlotMode
+
+
+def test_watcher_waits_for_files_to_settle(tmp_path):
+    watcher = DirectoryWatcher(PipelineRegistry(), tmp_path, settle_time=2)
+    path = tmp_path / "buoy.z05.00.20201201.000000.imu.bin"
+    path.write_bytes(b"abc")
+    (tmp_path / "notes.txt").write_text("Not an input file")
+
+    assert watcher.poll(now=0) == []
+    path.write_bytes(b"abcdef")  # Still being written
+    assert watcher.poll(now=1) == []
+    assert watcher.poll(now=2) == []
+    assert watcher.poll(now=3) == [path]
+    assert watcher.poll(now=10) == []
+
+    # Modified files are processed again
+    path.write_bytes(b"abcdefghi")
+    assert watcher.poll(now=11) == []
+    assert watcher.poll(now=13) == [path]
+
+
+def test_watcher_matches_each_file_once(tmp_path, monkeypatch):
+    registry = PipelineRegistry()
+    watcher = DirectoryWatcher(registry, tmp_path, settle_time=0)
+    path = tmp_path / "buoy.z05.00.20201201.000000.imu.bin"
+    path.write_bytes(b"abc")
+    (tmp_path / "notes.txt").write_text("Not an input file")
+
+    matched = []
+    match_input_key = registry._match_input_key
+
+    def count_matches(input_key):
+        matched.append(Path(input_key).name)
+        return match_input_key(input_key)
+
+    monkeypatch.setattr(registry, "_match_input_key", count_matches)
+    assert watcher.poll(now=0) == []
+    assert watcher.poll(now=1) == [path]
+    assert sorted(matched) == ["buoy.z05.00.20201201.000000.imu.bin", "notes.txt"]
+
+    # Files are matched again if they are removed and come back
+    path.unlink()
+    watcher.poll(now=2)
+    path.write_bytes(b"abc")
+    watcher.poll(now=3)
+    assert len(matched) == 3
+
+
+def test_watcher_retries_failed_files(tmp_path, monkeypatch):
+    registry = PipelineRegistry()
+    watcher = DirectoryWatcher(registry, tmp_path, settle_time=0, max_retries=2)
+    path = tmp_path / "buoy.z05.00.20201201.000000.imu.bin"
+    path.write_bytes(b"abc")
+
+    def dispatch(input_keys, workers):
+        dispatched.extend(input_keys)
+        if len(dispatched) == 1:
+            raise RuntimeError("Lost the connection to the workers")
+        registry.failed_inputs = list(input_keys)  # The pipeline run failed
+        return 0, len(input_keys), 0
+
+    dispatched = []
+    monkeypatch.setattr(registry, "dispatch", dispatch)
+
+    # Each failure queues the file again once it has settled, up to max_retries times
+    for _ in range(3):
+        assert watcher.poll(now=0) == []
+        assert watcher.poll(now=0) == [path]
+        watcher._dispatch([str(path)])
+    assert watcher.poll(now=0) == []
+    assert watcher.poll(now=0) == []
+    assert len(dispatched) == 3
+
+    # Modified files are tried again
+    path.write_bytes(b"abcdef")
+    assert watcher.poll(now=0) == []
+    assert watcher.poll(now=0) == [path]
+
+
+def test_watcher_isolates_failed_files(tmp_path):
+    input_key = "pipelines/waves/test/data/input/buoy.z05.00.20201201.000000.waves.csv"
+    registry = PipelineRegistry(plots=PlotMode.off)
+    watcher = DirectoryWatcher(registry, tmp_path, settle_time=0)
+    good = tmp_path / Path(input_key).name
+    shutil.copy(input_key, good)
+    ambiguous = tmp_path / "buoy.z07.00.20230801.000000.waves.csv"  # Matches 2 configs
+    shutil.copy(input_key, ambiguous)
+
+    assert watcher.poll(now=0) == []
+    assert watcher.poll(now=0) == [good, ambiguous]
+    watcher._dispatch([str(good), str(ambiguous)])
+
+    # Only the ambiguous file is queued again
+    assert watcher.poll(now=0) == []
+    assert watcher.poll(now=0) == [ambiguous]
+
+
+def test_watcher_records_outputs_in_manifest(tmp_path):
+    input_key = "pipelines/waves/test/data/input/buoy.z05.00.20201201.000000.waves.csv"
+    folder = tmp_path / "incoming"
+    folder.mkdir()
+    manifest = Manifest(tmp_path / "manifest.sqlite")
+    registry = PipelineRegistry(manifest, plots=PlotMode.off)
+    watcher = DirectoryWatcher(registry, folder, poll_interval=0.1, settle_time=0)
+    path = folder / Path(input_key).name
+    shutil.copy(input_key, path)
+
+    # The registry and manifest are created here but used by the dispatching thread
+    stop = threading.Event()
+    thread = threading.Thread(target=watcher.run, args=(stop,))
+    thread.start()
+    config_file = registry._match_input_key(str(path))[0]
+    deadline = time.monotonic() + 120
+    while not manifest.get_outputs(str(path), config_file):
+        assert time.monotonic() < deadline, "The input file was not processed"
+        time.sleep(0.1)
+    stop.set()
+    thread.join()
+
+    outputs = manifest.get_outputs(str(path), config_file)
+    assert all(Path(output).is_file() for output in outputs)
@@ -1,2 +1,31 @@
+from importlib import import_module
+from typing import Any
+
+from .gps import *
+from .manifest import *
+from .plotting import *
+from .profiling import *
 from .registry import *
-from .utils import *
+from .watcher import *
+
+# Modules that import tsdat or matplotlib are slow to import, so they are only loaded
+# once one of their members is used
+_lazy_members = {
+    "InputCache": "cache",
+    "CachedReader": "cache",
+    "FastStringToDatetime": "converters",
+    "ChunkedNetCDFWriter": "handlers",
+    "ChunkedZarrWriter": "handlers",
+    "ChunkedNetCDFHandler": "handlers",
+    "ChunkedZarrHandler": "handlers",
+    "CheckMissingAndValidRange": "qc",
+    "RecordPackedQualityResults": "qc",
+    "format_time_xticks": "utils",
+    "add_colorbar": "utils",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _lazy_members:
+        return getattr(import_module(f".{_lazy_members[name]}", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
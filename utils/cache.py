@@ -0,0 +1,178 @@
+import hashlib
+import inspect
+import logging
+import os
+import pickle
+import sys
+import tempfile
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import xarray as xr
+from pydantic import BaseModel, Extra
+from tsdat import DataReader
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["InputCache", "CachedReader"]
+
+
+class InputCache:
+    """---------------------------------------------------------------------------------
+    On-disk cache of the data read from input files, keyed by the content hash of the
+    input and a version string describing the reader. Entries are evicted in least
+    recently used order once the cache grows beyond `max_size` bytes.
+
+    ---------------------------------------------------------------------------------"""
+
+    def __init__(self, folder: Union[str, Path], max_size: int):
+        self.folder = Path(folder)
+        self.max_size = max_size
+
+    def key(self, input_key: Union[str, BytesIO], version: str) -> str:
+        """-----------------------------------------------------------------------------
+        Returns the cache key for the input, which is the sha256 hash of its contents
+        and the reader version.
+
+        Args:
+            input_key (Union[str, BytesIO]): The path to the input file or its contents.
+            version (str): A string identifying the reader and its configuration.
+
+        Returns:
+            str: The cache key.
+
+        -----------------------------------------------------------------------------"""
+        sha = hashlib.sha256(version.encode())
+        if isinstance(input_key, BytesIO):
+            sha.update(input_key.getbuffer())
+        else:
+            with open(input_key, "rb") as file:
+                for block in iter(lambda: file.read(1 << 20), b""):
+                    sha.update(block)
+        return sha.hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self.folder / f"{key}.pkl"
+        try:
+            with open(path, "rb") as file:
+                data = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.warning("Discarding unreadable cache entry '%s'", path)
+            path.unlink(missing_ok=True)
+            return None
+        os.utime(path)  # Mark the entry as recently used
+        return data
+
+    def put(self, key: str, data: Any):
+        self.folder.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temporary file first so concurrent readers never see partial
+        # entries
+        fd, tmp_path = tempfile.mkstemp(dir=self.folder, suffix=".tmp")
+        with os.fdopen(fd, "wb") as file:
+            pickle.dump(data, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.folder / f"{key}.pkl")
+        self.evict()
+
+    def evict(self):
+        """Removes the least recently used entries until the cache fits in max_size."""
+        entries = []
+        for path in self.folder.glob("*.pkl"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue  # Removed by another process
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            logger.debug("Evicted cache entry '%s'", path)
+
+
+def _nested_readers(reader: DataReader) -> List[DataReader]:
+    """Returns the reader and any readers nested in its parameters, recursively."""
+    readers = [reader]
+    parameters = getattr(reader.parameters, "__dict__", reader.parameters)
+    if isinstance(parameters, dict):
+        for value in parameters.values():
+            values = value.values() if isinstance(value, dict) else [value]
+            for _reader in values:
+                if isinstance(_reader, DataReader):
+                    readers.extend(_nested_readers(_reader))
+    return readers
+
+
+def _parameter_files(reader: DataReader) -> List[Path]:
+    """Returns the files referenced by Path parameters of the reader (e.g., the
+    retriever config used by the metocean BuoyReader)."""
+    parameters = getattr(reader.parameters, "__dict__", reader.parameters)
+    if not isinstance(parameters, dict):
+        return []
+    return [v for v in parameters.values() if isinstance(v, Path) and v.is_file()]
+
+
+def reader_version(reader: DataReader) -> str:
+    """Describes the reader class, its parameters, the contents of any files its
+    parameters point to, and the source code of the modules defining it and any readers
+    nested in its parameters, so cache entries are invalidated when any of these
+    change."""
+    sha = hashlib.sha256()
+    for _reader in _nested_readers(reader):
+        cls = type(_reader)
+        sha.update(f"{cls.__module__}.{cls.__qualname__}".encode())
+        sha.update(repr(_reader.parameters).encode())
+        sha.update(inspect.getsource(sys.modules[cls.__module__]).encode())
+        for path in _parameter_files(_reader):
+            sha.update(path.read_bytes())
+    return sha.hexdigest()
+
+
+class CachedReader(DataReader):
+    """---------------------------------------------------------------------------------
+    DataReader that wraps another DataReader and caches its output on disk, so that
+    reprocessing an unchanged input (e.g., a .zip or .7z archive) skips decompressing
+    and parsing it again.
+
+    ---------------------------------------------------------------------------------"""
+
+    class Parameters(BaseModel, extra=Extra.forbid):
+        reader: Any
+        """The DataReader whose output should be cached."""
+
+        cache_dir: Path = Path(".cache/inputs")
+        """The folder where cached datasets are stored."""
+
+        max_size_mb: float = 1024
+        """The maximum size of the cache folder in megabytes."""
+
+        version: str = ""
+        """Change this to invalidate all existing cache entries for this reader."""
+
+    parameters: Parameters
+
+    def read(self, input_key: str) -> Union[xr.Dataset, Dict[str, xr.Dataset]]:
+        reader: DataReader = self.parameters.reader
+        cache = InputCache(
+            self.parameters.cache_dir, int(self.parameters.max_size_mb * 1024**2)
+        )
+        version = self.parameters.version + reader_version(reader)
+        key = cache.key(input_key, version)
+
+        data = cache.get(key)
+        if data is not None:
+            logger.debug("Using cached data for input '%s'", input_key)
+            return data
+
+        data = reader.read(input_key)
+        try:
+            cache.put(key, data)
+        except OSError:
+            logger.warning("Could not cache data for input '%s'", input_key)
+        return data
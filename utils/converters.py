@@ -0,0 +1,158 @@
+import re
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+from numpy.typing import NDArray
+from tsdat import DatasetConfig, RetrievedDataset, StringToDatetime
+
+__all__ = ["FastStringToDatetime"]
+
+
+# Formats parsed by pandas' vectorized ISO 8601 parser rather than strptime
+_ISO_FORMAT_REGEX = re.compile(r"^%Y-%m-%d(?:[ T]%H:%M(?::%S)?)?$")
+
+# Directives that are always written with the same number of digits when zero-padded
+_FIELD_WIDTHS = {"Y": 4, "m": 2, "d": 2, "H": 2, "M": 2, "S": 2}
+
+# The value of each field that strptime uses when it is not in the format
+_FIELD_DEFAULTS = {"Y": 1900, "m": 1, "d": 1, "H": 0, "M": 0, "S": 0}
+
+# Years that fit in datetime64[ns]; others are left for pandas to reject
+_MIN_YEAR, _MAX_YEAR = 1678, 2261
+
+
+def _get_layout(
+    format: str,
+) -> Optional[Tuple[List[Tuple[str, int, int]], List[Tuple[int, str]], int]]:
+    """Returns the (directive, start, width) of each field, the (position, character) of
+    each literal character, and the length of strings written with the format, or None
+    if the format contains directives that are not fixed-width."""
+    fields: List[Tuple[str, int, int]] = []
+    literals: List[Tuple[int, str]] = []
+    position, i = 0, 0
+    while i < len(format):
+        char = format[i]
+        if char == "%":
+            directive = format[i + 1 : i + 2]
+            if directive == "%":
+                literals.append((position, "%"))
+                position += 1
+            elif directive in _FIELD_WIDTHS and directive not in [f[0] for f in fields]:
+                fields.append((directive, position, _FIELD_WIDTHS[directive]))
+                position += _FIELD_WIDTHS[directive]
+            else:
+                return None
+            i += 2
+        else:
+            literals.append((position, char))
+            position += 1
+            i += 1
+    return fields, literals, position
+
+
+def _parse_fixed_width(
+    strings: NDArray[Any],
+    layout: Tuple[List[Tuple[str, int, int]], List[Tuple[int, str]], int],
+) -> Tuple[NDArray[np.datetime64], NDArray[np.bool_]]:
+    """Parses strings that match the layout exactly (zero-padded fields and valid
+    dates) by slicing their characters. Returns the parsed values in datetime64[s] and
+    a mask of the strings that were parsed."""
+    fields, literals, length = layout
+    n = len(strings)
+    text = strings.astype(str)
+    width = text.dtype.itemsize // 4
+    if width < length or not length:
+        return np.zeros(n, dtype="datetime64[s]"), np.zeros(n, dtype=bool)
+
+    chars = text.view(np.uint32).reshape(n, width).astype(np.int32)
+    matched = chars[:, length - 1] != 0
+    if width > length:
+        matched &= chars[:, length] == 0
+    for position, char in literals:
+        matched &= chars[:, position] == ord(char)
+
+    values = dict(_FIELD_DEFAULTS)
+    for directive, start, size in fields:
+        digits = chars[:, start : start + size] - ord("0")
+        matched &= ((digits >= 0) & (digits <= 9)).all(axis=1)
+        values[directive] = digits @ (10 ** np.arange(size - 1, -1, -1))
+
+    year, month, day = values["Y"], values["m"], values["d"]
+    hour, minute, second = values["H"], values["M"], values["S"]
+    matched &= (year >= _MIN_YEAR) & (year <= _MAX_YEAR)
+    matched &= (month >= 1) & (month <= 12)
+    matched &= (hour < 24) & (minute < 60) & (second < 60)
+
+    # Out of range values are clipped so the arithmetic below is valid; those strings
+    # are not marked as parsed
+    year = np.clip(year, _MIN_YEAR, _MAX_YEAR)
+    months = (year - 1970) * 12 + np.clip(month, 1, 12) - 1
+    month_start = months.astype("datetime64[M]").astype("datetime64[D]")
+    days_in_month = ((months + 1).astype("datetime64[M]") - month_start).astype(int)
+    matched &= (day >= 1) & (day <= days_in_month)
+
+    seconds = (hour * 60 + minute) * 60 + second
+    parsed = (month_start + (day - 1)).astype("datetime64[s]") + seconds
+    return parsed, matched
+
+
+class FastStringToDatetime(StringToDatetime):
+    """---------------------------------------------------------------------------------
+    Converts date strings into datetime64 data like tsdat's StringToDatetime, with the
+    same output, but without parsing fixed-width formats one string at a time.
+
+    ISO-like formats (e.g., '%Y-%m-%d %H:%M:%S') are passed to pandas, which parses
+    them with its vectorized ISO 8601 parser. Other formats made up of zero-padded %Y,
+    %m, %d, %H, %M, and %S fields (e.g., '%m/%d/%Y %H:%M') are parsed by slicing the
+    characters of every string at once. Strings that do not match the format exactly
+    (e.g., '1/5/2020 00:00' or missing values) fall back to pandas and strptime, as do
+    formats with any other directive and converters with `to_datetime_kwargs` set.
+
+    ---------------------------------------------------------------------------------"""
+
+    def convert(
+        self,
+        data: xr.DataArray,
+        variable_name: str,
+        dataset_config: DatasetConfig,
+        retrieved_dataset: RetrievedDataset,
+        **kwargs: Any,
+    ) -> Optional[xr.DataArray]:
+        layout = None
+        if (
+            self.format
+            and not self.to_datetime_kwargs
+            and not _ISO_FORMAT_REGEX.match(self.format)
+            and data.dtype.kind in "OU"
+            and data.ndim == 1
+        ):
+            layout = _get_layout(self.format)
+        if layout is None:
+            return super().convert(
+                data, variable_name, dataset_config, retrieved_dataset, **kwargs
+            )
+
+        # Parse each distinct string once if there are many repeats (e.g., formats
+        # without a time), like pandas does
+        strings, codes = data.data, None
+        sample = strings[: min(500, max(50, len(strings) // 10))]
+        if len(sample) and len(set(sample)) < 0.7 * len(sample):
+            codes, strings = pd.factorize(strings, use_na_sentinel=False)
+
+        parsed, matched = _parse_fixed_width(strings, layout)
+        times = parsed.astype("datetime64[ns]")
+        if not matched.all():
+            times[~matched] = pd.to_datetime(strings[~matched], format=self.format)
+        if codes is not None:
+            times = times[codes]
+
+        # StringToDatetime applies the timezone and output dtype to the parsed times
+        return super().convert(
+            data.copy(data=times),
+            variable_name,
+            dataset_config,
+            retrieved_dataset,
+            **kwargs,
+        )
@@ -0,0 +1,61 @@
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+__all__ = ["GPS_EPOCH", "LEAP_SECONDS", "gps_to_utc"]
+
+
+GPS_EPOCH = np.datetime64("1980-01-06T00:00:00", "ns")
+"""The start of GPS time (week 0, time of week 0)."""
+
+# (UTC date the offset took effect, GPS - UTC offset in seconds)
+LEAP_SECONDS = [
+    ("1981-07-01", 1),
+    ("1982-07-01", 2),
+    ("1983-07-01", 3),
+    ("1985-07-01", 4),
+    ("1988-01-01", 5),
+    ("1990-01-01", 6),
+    ("1991-01-01", 7),
+    ("1992-07-01", 8),
+    ("1993-07-01", 9),
+    ("1994-07-01", 10),
+    ("1996-01-01", 11),
+    ("1997-07-01", 12),
+    ("1999-01-01", 13),
+    ("2006-01-01", 14),
+    ("2009-01-01", 15),
+    ("2012-07-01", 16),
+    ("2015-07-01", 17),
+    ("2017-01-01", 18),
+]
+"""Leap seconds inserted since the GPS epoch. Append to this table when the IERS
+announces a new leap second."""
+
+
+def gps_to_utc(week_number: ArrayLike, tow: ArrayLike) -> NDArray[np.datetime64]:
+    """----------------------------------------------------------------------------
+    Converts GPS week numbers and times of week into UTC timestamps, accounting for
+    the leap seconds that separated GPS time and UTC at each timestamp. All of the
+    arithmetic is vectorized over the input arrays in datetime64[ns].
+
+    Args:
+        week_number (ArrayLike): The (unrolled) GPS week number of each sample.
+        tow (ArrayLike): The GPS time of week of each sample in seconds.
+
+    Returns:
+        NDArray[np.datetime64]: The UTC timestamps as datetime64[ns] values.
+
+    ----------------------------------------------------------------------------"""
+    weeks = np.asarray(week_number, dtype=np.int64) * np.timedelta64(7, "D")
+    nanoseconds = np.round(np.asarray(tow, dtype=np.float64) * 1e9).astype(np.int64)
+    gps_time = GPS_EPOCH + weeks + nanoseconds.astype("timedelta64[ns]")
+
+    # Each leap second takes effect at midnight UTC, which is `offset` seconds past
+    # midnight in GPS time
+    offsets = np.array([0] + [offset for _, offset in LEAP_SECONDS], dtype=np.int64)
+    transitions = np.array(
+        [np.datetime64(date, "ns") + np.timedelta64(o, "s") for date, o in LEAP_SECONDS]
+    )
+    leap_seconds = offsets[np.searchsorted(transitions, gps_time, side="right")]
+
+    return gps_time - leap_seconds.astype("timedelta64[s]")
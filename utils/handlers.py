@@ -0,0 +1,201 @@
+import copy
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import xarray as xr
+from pydantic import Extra, validator
+from tsdat.io.handlers import FileHandler
+from tsdat.io.readers import NetCDFReader, ZarrReader
+from tsdat.io.writers import NetCDFWriter, ZarrWriter
+
+__all__ = [
+    "ChunkedNetCDFWriter",
+    "ChunkedZarrWriter",
+    "ChunkedNetCDFHandler",
+    "ChunkedZarrHandler",
+]
+
+
+# Storage settings read back from existing files that the writers set themselves
+_STORAGE_ENCODINGS = {
+    "contiguous",
+    "chunksizes",
+    "chunks",
+    "preferred_chunks",
+    "compressor",
+    "szip",
+    "zstd",
+    "bzip2",
+    "blosc",
+}
+
+
+def _get_encoding(variable: xr.Variable) -> Dict[str, Any]:
+    encoding = {
+        key: value
+        for key, value in variable.encoding.items()
+        if key not in _STORAGE_ENCODINGS
+    }
+    # Prevent Xarray from setting 'nan' as the default _FillValue
+    if "_FillValue" not in encoding and "_FillValue" not in variable.attrs:
+        encoding["_FillValue"] = None
+    return encoding
+
+
+def _get_chunk_sizes(
+    variable: xr.Variable, chunks: Dict[str, int]
+) -> Tuple[int, ...]:
+    """Returns the chunk length along each dimension of the variable. Dimensions not
+    listed in `chunks` are stored in a single chunk."""
+    return tuple(
+        max(1, min(chunks.get(dim, size), size))
+        for dim, size in zip(variable.dims, variable.shape)
+    )
+
+
+def _is_chunkable(variable: xr.Variable) -> bool:
+    # Scalars and strings are stored as-is
+    return bool(variable.dims) and variable.dtype.kind not in "OSU"
+
+
+class ChunkedNetCDFWriter(NetCDFWriter):
+    """---------------------------------------------------------------------------------
+    Writes the dataset to a chunked, compressed netCDF4 file. Unlike tsdat's
+    NetCDFWriter, which drops any chunk settings and lets the netCDF library pick the
+    chunk shapes, the chunk length along each dimension is set explicitly so it can be
+    matched to how each datastream is read back.
+
+    ---------------------------------------------------------------------------------"""
+
+    class Parameters(NetCDFWriter.Parameters, extra=Extra.forbid):
+        chunks: Dict[str, int] = {}
+        """The chunk length along each dimension, e.g., {"time": 144}. Dimensions
+        that are not listed are stored in a single chunk. Chunks are used whether or
+        not `compression_level` is set."""
+
+        shuffle: bool = True
+        """Apply the shuffle filter before compressing the data."""
+
+    parameters: Parameters = Parameters()
+
+    def write(
+        self, dataset: xr.Dataset, filepath: Optional[Path] = None, **kwargs: Any
+    ) -> None:
+        to_netcdf_kwargs = copy.deepcopy(self.parameters.to_netcdf_kwargs)
+        encoding_dict: Dict[str, Dict[str, Any]] = {}
+        for name, variable in dataset.variables.items():
+            encoding = _get_encoding(variable)
+            if _is_chunkable(variable):
+                # Chunks are used even without compression
+                encoding["chunksizes"] = _get_chunk_sizes(
+                    variable, self.parameters.chunks
+                )
+                if self.parameters.compression_level:
+                    encoding.update(
+                        {
+                            self.parameters.compression_engine: True,
+                            "complevel": self.parameters.compression_level,
+                            "shuffle": self.parameters.shuffle,
+                        }
+                    )
+            encoding_dict[str(name)] = encoding
+        to_netcdf_kwargs["encoding"] = encoding_dict
+        dataset.to_netcdf(filepath, **to_netcdf_kwargs)  # type: ignore
+
+
+class ChunkedZarrWriter(ZarrWriter):
+    """---------------------------------------------------------------------------------
+    Writes the dataset to a zarr archive with explicit chunk shapes, compressing each
+    chunk with Blosc (zstd and byte shuffling). Existing archives at the same path are
+    overwritten.
+
+    ---------------------------------------------------------------------------------"""
+
+    class Parameters(ZarrWriter.Parameters, extra=Extra.forbid):
+        chunks: Dict[str, int] = {}
+        """The chunk length along each dimension, e.g., {"time": 144}. Dimensions
+        that are not listed are stored in a single chunk. Chunks are used whether or
+        not `compression_level` is set."""
+
+        compression_level: int = 5
+        """The Blosc compression level to use (0-9). Set to 0 to not compress."""
+
+    parameters: Parameters = Parameters()
+
+    def write(
+        self, dataset: xr.Dataset, filepath: Optional[Path] = None, **kwargs: Any
+    ) -> None:
+        from numcodecs import Blosc
+
+        compressor = None
+        if self.parameters.compression_level:
+            compressor = Blosc(
+                cname="zstd",
+                clevel=self.parameters.compression_level,
+                shuffle=Blosc.SHUFFLE,
+            )
+
+        encoding_dict: Dict[str, Dict[str, Any]] = {}
+        for name, variable in dataset.variables.items():
+            encoding = _get_encoding(variable)
+            # Xarray rejects a None _FillValue next to other zarr encodings. Zarr keeps
+            # the default fill value in the array metadata instead of the attributes,
+            # so it can be left to xarray
+            if "_FillValue" in encoding and encoding["_FillValue"] is None:
+                del encoding["_FillValue"]
+            if _is_chunkable(variable):
+                encoding["chunks"] = _get_chunk_sizes(variable, self.parameters.chunks)
+                encoding["compressor"] = compressor
+            encoding_dict[str(name)] = encoding
+
+        to_zarr_kwargs = {"mode": "w", **self.parameters.to_zarr_kwargs}
+        to_zarr_kwargs["encoding"] = encoding_dict
+        dataset.to_zarr(filepath, **to_zarr_kwargs)  # type: ignore
+
+
+class ChunkedNetCDFHandler(FileHandler):
+    """---------------------------------------------------------------------------------
+    FileHandler for chunked, compressed netCDF4 files. Its parameters are passed to the
+    ChunkedNetCDFWriter, so they can be set per pipeline in the storage config file,
+    e.g.:
+
+    ```yaml
+    handler:
+      classname: utils.ChunkedNetCDFHandler
+      parameters:
+        chunks:
+          time: 144
+    ```
+
+    ---------------------------------------------------------------------------------"""
+
+    parameters: ChunkedNetCDFWriter.Parameters = ChunkedNetCDFWriter.Parameters()
+    extension: str = ".nc"
+    reader: NetCDFReader = NetCDFReader()
+    writer: ChunkedNetCDFWriter = ChunkedNetCDFWriter()
+
+    @validator("writer", always=True)
+    def _configure_writer(
+        cls, writer: ChunkedNetCDFWriter, values: Dict[str, Any]
+    ) -> ChunkedNetCDFWriter:
+        return ChunkedNetCDFWriter(parameters=values.get("parameters", {}))
+
+
+class ChunkedZarrHandler(FileHandler):
+    """---------------------------------------------------------------------------------
+    FileHandler for chunked, compressed zarr archives (one archive per output file).
+    Its parameters are passed to the ChunkedZarrWriter, so they can be set per pipeline
+    in the storage config file.
+
+    ---------------------------------------------------------------------------------"""
+
+    parameters: ChunkedZarrWriter.Parameters = ChunkedZarrWriter.Parameters()
+    extension: str = ".zarr"
+    reader: ZarrReader = ZarrReader()
+    writer: ChunkedZarrWriter = ChunkedZarrWriter()
+
+    @validator("writer", always=True)
+    def _configure_writer(
+        cls, writer: ChunkedZarrWriter, values: Dict[str, Any]
+    ) -> ChunkedZarrWriter:
+        return ChunkedZarrWriter(parameters=values.get("parameters", {}))
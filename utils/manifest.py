@@ -0,0 +1,96 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Union
+
+__all__ = ["Fingerprint", "Manifest"]
+
+
+class Fingerprint(NamedTuple):
+    """Identifies the exact input data, configuration, and code used to process an
+    input key."""
+
+    content_hash: str
+    config_hash: str
+    code_version: str
+
+
+class Manifest:
+    """---------------------------------------------------------------------------------
+    Persistent record of the input keys that have been processed, stored in a local
+    SQLite database. Each input key and pipeline config pair is stored with the
+    fingerprint it had when it was last processed successfully and the paths to the
+    output files that were produced, so unchanged inputs can be skipped when the raw
+    data are reprocessed.
+
+    The manifest can be used from any thread (e.g., the dispatching thread of a
+    DirectoryWatcher); queries and writes are serialized with a lock.
+
+    Args:
+        path (Union[str, Path]): Path to the SQLite database file. It is created if it
+            does not exist. Defaults to '.cache/manifest.sqlite'.
+
+    ---------------------------------------------------------------------------------"""
+
+    def __init__(self, path: Union[str, Path] = Path(".cache/manifest.sqlite")):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS processed (
+                    input_key TEXT NOT NULL,
+                    config TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    config_hash TEXT NOT NULL,
+                    code_version TEXT NOT NULL,
+                    outputs TEXT NOT NULL,
+                    processed_at TEXT NOT NULL,
+                    PRIMARY KEY (input_key, config)
+                )
+                """
+            )
+
+    def get(self, input_key: str, config_file: Path) -> Optional[Fingerprint]:
+        """Returns the fingerprint the input key had when it was last processed by the
+        pipeline config, or None if it has not been processed by it."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT content_hash, config_hash, code_version FROM processed"
+                " WHERE input_key = ? AND config = ?",
+                (input_key, config_file.as_posix()),
+            ).fetchone()
+        return Fingerprint(*row) if row is not None else None
+
+    def get_outputs(self, input_key: str, config_file: Path) -> List[str]:
+        """Returns the output files recorded for the input key and pipeline config."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT outputs FROM processed WHERE input_key = ? AND config = ?",
+                (input_key, config_file.as_posix()),
+            ).fetchone()
+        return json.loads(row[0]) if row is not None else []
+
+    def record(
+        self,
+        input_key: str,
+        config_file: Path,
+        fingerprint: Fingerprint,
+        outputs: List[str],
+    ):
+        """Records that the input key was processed successfully by the pipeline."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO processed VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    input_key,
+                    config_file.as_posix(),
+                    *fingerprint,
+                    json.dumps(outputs),
+                    datetime.now(timezone.utc).isoformat(),
+                ),
+            )
@@ -0,0 +1,227 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, TypeVar, Union
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import xarray as xr
+    from matplotlib.axes import Axes
+    from matplotlib.figure import Figure
+
+__all__ = [
+    "STYLE",
+    "MAX_POINTS",
+    "MAX_BINS",
+    "setup_matplotlib",
+    "render_figures",
+    "decimate_minmax",
+    "bin_time",
+    "plot_histogram",
+]
+
+
+STYLE = "shared/styling.mplstyle"
+"""The matplotlib style used for all plots."""
+
+MAX_POINTS = 2000
+"""The maximum number of points drawn for each line in a time series plot."""
+
+MAX_BINS = 1000
+"""The maximum number of time steps drawn in contour plots and heatmaps."""
+
+_loaded_style: Optional[str] = None
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+
+_XarrayT = TypeVar("_XarrayT", "xr.Dataset", "xr.DataArray")
+
+
+def setup_matplotlib(style: str = STYLE):
+    """----------------------------------------------------------------------------
+    Selects the non-interactive Agg backend and applies the matplotlib style. The style
+    is only loaded the first time this is called in each process (including processes
+    forked after it was called).
+
+    Args:
+        style (str): Path to the matplotlib style file. Defaults to STYLE.
+
+    ----------------------------------------------------------------------------"""
+    global _loaded_style
+    if _loaded_style == style:
+        return
+
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    plt.style.use("default")  # clear any styles that were set before
+    plt.style.use(style)
+    _loaded_style = style
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Returns the worker pool shared by all calls to render_figures in this process,
+    replacing it if a different number of workers is requested."""
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool, _pool_workers = ProcessPoolExecutor(max_workers=workers), workers
+    return _pool
+
+
+def _render_figure(
+    plot: Callable[..., "Figure"], dataset: "xr.Dataset", filepath: Path, **kwargs: Any
+):
+    import matplotlib.pyplot as plt
+
+    setup_matplotlib()
+    fig = plot(dataset, **kwargs)
+    fig.savefig(filepath)
+    plt.close(fig)
+
+
+def render_figures(
+    figures: Dict[str, Callable[..., "Figure"]],
+    dataset: "xr.Dataset",
+    folder: Path,
+    workers: Optional[int] = None,
+    **kwargs: Any,
+):
+    """----------------------------------------------------------------------------
+    Creates figures for a dataset and saves them as png files named using
+    `tsdat.get_filename(dataset, title=title, extension="png")`. The figures are
+    rendered concurrently in a pool of worker processes that is shared by all calls in
+    this process. When called from a worker process (e.g., a pipeline run with
+    `--workers` or a deferred plot worker), the figures are rendered one at a time
+    instead, so the number of processes does not multiply.
+
+    Each figure is created by a function taking the dataset and `kwargs` as arguments
+    and returning a matplotlib Figure. Because the function is sent to the worker
+    processes, it must be defined at the top level of a module.
+
+    Args:
+        figures (Dict[str, Callable[..., Figure]]): The function that creates each
+            figure, keyed by the title used in the figure's filename.
+        dataset (xr.Dataset): The dataset to plot.
+        folder (Path): The folder where the figures should be saved.
+        workers (Optional[int]): The maximum number of worker processes. If 1, the
+            figures are rendered one at a time in this process. Defaults to None (the
+            number of CPUs).
+        **kwargs: Additional keyword arguments passed to each figure function.
+
+    ----------------------------------------------------------------------------"""
+    from tsdat import get_filename
+
+    setup_matplotlib()
+    filepaths = {
+        title: Path(folder) / get_filename(dataset, title=title, extension="png")
+        for title in figures
+    }
+    workers = workers or os.cpu_count() or 1
+
+    in_worker = multiprocessing.parent_process() is not None
+    if workers <= 1 or len(figures) <= 1 or in_worker:
+        for title, plot in figures.items():
+            _render_figure(plot, dataset, filepaths[title], **kwargs)
+        return
+
+    pool = _get_pool(workers)
+    futures = [
+        pool.submit(_render_figure, plot, dataset, filepaths[title], **kwargs)
+        for title, plot in figures.items()
+    ]
+    for future in futures:
+        future.result()  # Raise any errors from the worker processes
+
+
+def decimate_minmax(
+    data: "xr.DataArray", max_points: int = MAX_POINTS, dim: str = "time"
+) -> "xr.DataArray":
+    """----------------------------------------------------------------------------
+    Downsamples a 1D variable for line plots by splitting it into max_points / 2
+    consecutive bins and keeping only the smallest and largest value in each bin, so
+    the envelope of the line (including any spikes) looks the same as it would at full
+    resolution.
+
+    Args:
+        data (xr.DataArray): The variable to downsample.
+        max_points (int): The maximum number of points to keep. Defaults to
+            MAX_POINTS.
+        dim (str): The dimension to downsample along. Defaults to "time".
+
+    Returns:
+        xr.DataArray: The selected samples, or `data` itself if it has at most
+            `max_points` samples.
+
+    ----------------------------------------------------------------------------"""
+    size = data.sizes[dim]
+    if size <= max_points:
+        return data
+
+    bin_size = -(-size // (max_points // 2))  # ceil
+    n_bins = -(-size // bin_size)
+    values = np.full(n_bins * bin_size, np.nan)
+    values[:size] = data.values
+    values = values.reshape(n_bins, bin_size)
+
+    missing = np.isnan(values)
+    starts = np.arange(n_bins) * bin_size
+    imin = starts + np.where(missing, np.inf, values).argmin(axis=1)
+    imax = starts + np.where(missing, -np.inf, values).argmax(axis=1)
+    index = np.unique(np.minimum(np.concatenate([imin, imax]), size - 1))
+    return data.isel({dim: index})
+
+
+def bin_time(
+    data: _XarrayT, max_bins: int = MAX_BINS, dim: str = "time"
+) -> _XarrayT:
+    """----------------------------------------------------------------------------
+    Averages the data onto a coarser time grid for contour plots and heatmaps by
+    taking the mean of each run of consecutive time steps, so there are at most
+    `max_bins` bins. Each bin is labeled with its mean time.
+
+    Args:
+        data (Union[xr.Dataset, xr.DataArray]): The data to average.
+        max_bins (int): The maximum number of time steps to keep. Defaults to
+            MAX_BINS.
+        dim (str): The time dimension. Defaults to "time".
+
+    Returns:
+        Union[xr.Dataset, xr.DataArray]: The binned data, or `data` itself if it has
+            at most `max_bins` time steps.
+
+    ----------------------------------------------------------------------------"""
+    size = data.sizes[dim]
+    if size <= max_bins:
+        return data
+    window = -(-size // max_bins)  # ceil
+    return data.coarsen({dim: window}, boundary="pad").mean(keep_attrs=True)
+
+
+def plot_histogram(
+    ax: "Axes",
+    data: Union["xr.DataArray", np.ndarray],
+    bins: int = 100,
+    **kwargs: Any,
+):
+    """----------------------------------------------------------------------------
+    Draws a step histogram of the data. The counts are computed up front with
+    `np.histogram`, so only `bins` steps are passed to matplotlib no matter how many
+    samples there are.
+
+    Args:
+        ax (Axes): The axes to draw on.
+        data (Union[xr.DataArray, np.ndarray]): The values to count. NaNs are ignored.
+        bins (int): The number of equal-width bins. Defaults to 100.
+        **kwargs: Additional keyword arguments passed to `ax.stairs`.
+
+    ----------------------------------------------------------------------------"""
+    values = np.asarray(data).ravel()
+    counts, edges = np.histogram(values[np.isfinite(values)], bins=bins)
+    return ax.stairs(counts, edges, **kwargs)
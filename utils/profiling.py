@@ -0,0 +1,88 @@
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, TextIO
+
+__all__ = ["ImportTime", "parse_import_time", "format_import_report", "profile_imports"]
+
+
+class ImportTime(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+_IMPORT_TIME_REGEX = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def parse_import_time(line: str) -> Optional[ImportTime]:
+    """Parses a line written by `python -X importtime`, or returns None if the line is
+    not one of them."""
+    match = _IMPORT_TIME_REGEX.match(line)
+    if match is None:
+        return None
+    self_us, cumulative_us, indent, module = match.groups()
+    return ImportTime(module, int(self_us), int(cumulative_us), len(indent) // 2)
+
+
+def format_import_report(timings: List[ImportTime], top: int = 20) -> str:
+    """-----------------------------------------------------------------------------
+    Summarizes import times, listing the top-level packages that took the longest to
+    import (the sum of their modules' own import times) and the slowest individual
+    modules (including the modules they import).
+
+    Args:
+        timings (List[ImportTime]): The import times of each module.
+        top (int): The number of packages and modules to list. Defaults to 20.
+
+    Returns:
+        str: The report.
+
+    -----------------------------------------------------------------------------"""
+    packages: Dict[str, int] = defaultdict(int)
+    for timing in timings:
+        packages[timing.module.split(".")[0]] += timing.self_us
+    total = sum(packages.values())
+
+    lines = [f"Total import time: {total / 1e6:.3f} s", "", "Slowest packages:"]
+    for package, us in sorted(packages.items(), key=lambda p: -p[1])[:top]:
+        lines.append(f"  {us / 1e6:8.3f} s  {100 * us / total:5.1f}%  {package}")
+
+    lines += ["", "Slowest modules (including their imports):"]
+    for timing in sorted(timings, key=lambda t: -t.cumulative_us)[:top]:
+        lines.append(f"  {timing.cumulative_us / 1e6:8.3f} s  {timing.module}")
+    return "\n".join(lines)
+
+
+def profile_imports(args: List[str], report: TextIO = sys.stderr) -> int:
+    """-----------------------------------------------------------------------------
+    Runs a python command with `-X importtime` and writes a summary of where the time
+    spent importing modules went. The command's other output is passed through.
+
+    Args:
+        args (List[str]): The arguments to pass to the python interpreter, e.g.,
+            ["runner.py", "run", "data.csv"].
+        report (TextIO): Where to write the report. Defaults to sys.stderr.
+
+    Returns:
+        int: The return code of the command.
+
+    -----------------------------------------------------------------------------"""
+    process = subprocess.Popen(
+        [sys.executable, "-X", "importtime", *args],
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    timings: List[ImportTime] = []
+    assert process.stderr is not None
+    for line in process.stderr:
+        timing = parse_import_time(line)
+        if timing is not None:
+            timings.append(timing)
+        elif not line.startswith("import time:"):
+            sys.stderr.write(line)
+    returncode = process.wait()
+    report.write(format_import_report(timings) + "\n")
+    return returncode
@@ -0,0 +1,161 @@
+from typing import Any, List, Literal, Optional, Union
+
+import numpy as np
+import xarray as xr
+from numpy.typing import NDArray
+from pydantic import BaseModel, Extra, Field, validator
+from tsdat import QualityChecker, QualityHandler
+
+__all__ = ["CheckMissingAndValidRange", "RecordPackedQualityResults"]
+
+
+def _get_threshold(attrs: Any, name: str, min_: bool) -> Optional[float]:
+    threshold: Optional[Union[float, List[float]]] = attrs.get(name, None)
+    if isinstance(threshold, list):
+        threshold = threshold[0 if min_ else -1]
+    return threshold
+
+
+class CheckMissingAndValidRange(QualityChecker):
+    """---------------------------------------------------------------------------------
+    Runs tsdat's CheckMissing, CheckValidMin, and CheckValidMax checks on a variable in
+    a single pass and returns the results bit-packed into one integer array, with the
+    bit for each check set where it failed.
+
+    The results are the same as running the three checks one after another, each
+    followed by RemoveFailedValues, e.g., a missing value replaced with a _FillValue
+    below valid_min also fails the valid_min check.
+
+    The results must be handled by RecordPackedQualityResults; tsdat's handlers expect
+    a boolean array.
+
+    ---------------------------------------------------------------------------------"""
+
+    class Parameters(BaseModel, extra=Extra.forbid):
+        missing_bit: int = Field(1, ge=1, lt=32)
+        """The bit set for values equal to the _FillValue or NaN."""
+
+        min_bit: int = Field(2, ge=1, lt=32)
+        """The bit set for values less than the valid_min."""
+
+        max_bit: int = Field(3, ge=1, lt=32)
+        """The bit set for values greater than the valid_max."""
+
+    parameters: Parameters = Parameters()
+
+    def run(self, dataset: xr.Dataset, variable_name: str) -> NDArray[np.int32]:
+        variable = dataset[variable_name]
+        data = variable.data
+        fill_value = variable.attrs.get("_FillValue", None)
+
+        missing: NDArray[np.bool_] = variable.isnull().data
+        if fill_value is not None:
+            missing |= data == fill_value
+        elif np.issubdtype(data.dtype, str):  # type: ignore
+            missing |= data == ""
+        results = missing.astype(np.int32) << (self.parameters.missing_bit - 1)
+
+        # Values that failed a check are compared as if they had already been replaced
+        # with the _FillValue (or NaN, which never fails)
+        removed = missing
+        valid_min = _get_threshold(variable.attrs, "valid_min", min_=True)
+        if valid_min is not None:
+            fill_fails = fill_value is not None and fill_value < valid_min
+            below = np.where(removed, fill_fails, np.less(data, valid_min))
+            results |= below.astype(np.int32) << (self.parameters.min_bit - 1)
+            removed = removed | below
+
+        valid_max = _get_threshold(variable.attrs, "valid_max", min_=False)
+        if valid_max is not None:
+            fill_fails = fill_value is not None and fill_value > valid_max
+            above = np.where(removed, fill_fails, np.greater(data, valid_max))
+            results |= above.astype(np.int32) << (self.parameters.max_bit - 1)
+
+        return results
+
+
+class _PackedTest(BaseModel, extra=Extra.forbid):
+    bit: int = Field(ge=1, lt=32)
+    """The bit number used to indicate if the check failed."""
+
+    assessment: Literal["bad", "indeterminate"]
+    """Indicates the quality of the data if the test results indicate a failure."""
+
+    meaning: str
+    """A string that describes the test applied."""
+
+    @validator("assessment", pre=True)
+    def to_lower(cls, assessment: Any) -> str:
+        if isinstance(assessment, str):
+            return assessment.lower()
+        raise ValueError(
+            f"assessment must be 'bad' or 'indeterminate', not {assessment}"
+        )
+
+
+class RecordPackedQualityResults(QualityHandler):
+    """---------------------------------------------------------------------------------
+    Handles the bit-packed results of CheckMissingAndValidRange. Replaces every value
+    that failed any check with the variable's _FillValue (or NaN) in one step and
+    writes the results straight into the ancillary qc variable, producing the same
+    qc variable as RemoveFailedValues and RecordQualityResults would for each bit.
+
+    ---------------------------------------------------------------------------------"""
+
+    class Parameters(BaseModel, extra=Extra.forbid):
+        tests: List[_PackedTest]
+        """The bit, assessment, and meaning of each check."""
+
+        remove_failed_values: bool = True
+        """Replace values that failed any check with the _FillValue."""
+
+    parameters: Parameters
+
+    def run(
+        self, dataset: xr.Dataset, variable_name: str, failures: NDArray[np.int32]
+    ) -> xr.Dataset:
+        if self.parameters.remove_failed_values and failures.any():
+            fill_value = dataset[variable_name].attrs.get("_FillValue", None)
+            passed = failures == 0
+            dataset[variable_name] = dataset[variable_name].where(passed, fill_value)
+
+        # Merge into an existing qc variable with ACT so its other tests are kept
+        existing = dataset.qcfilter.check_for_ancillary_qc(
+            variable_name, add_if_missing=False
+        )
+        if existing is not None or f"qc_{variable_name}" in dataset:
+            for test in self.parameters.tests:
+                dataset.qcfilter.add_test(
+                    variable_name,
+                    index=(failures & (1 << test.bit - 1)) != 0,
+                    test_number=test.bit,
+                    test_meaning=test.meaning,
+                    test_assessment=test.assessment,
+                )
+            return dataset
+
+        masks = [np.uint32(1 << test.bit - 1) for test in self.parameters.tests]
+        tested = np.int32(sum(int(mask) for mask in masks))
+        variable = dataset[variable_name]
+        if "long_name" in variable.attrs:
+            long_name = f"Quality check results on field: {variable.attrs['long_name']}"
+        else:
+            long_name = f"Quality check results for {variable_name}"
+
+        qc_variable_name = f"qc_{variable_name}"
+        dataset[qc_variable_name] = xr.DataArray(
+            data=failures & tested,
+            coords=variable.coords,
+            attrs={
+                "long_name": long_name,
+                "units": "1",
+                "flag_masks": masks,
+                "flag_meanings": [test.meaning for test in self.parameters.tests],
+                "flag_assessments": [
+                    test.assessment.capitalize() for test in self.parameters.tests
+                ],
+                "standard_name": "quality_flag",
+            },
+        )
+        dataset.qcfilter.update_ancillary_variable(variable_name, qc_variable_name)
+        return dataset
@@ -1,25 +1,348 @@
+import glob
+import hashlib
 import logging
 import re
+from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from enum import Enum
+from importlib.metadata import version
 from pathlib import Path
-from typing import Dict, List, Pattern, Tuple
-from tsdat import PipelineConfig, read_yaml
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Pattern,
+    Set,
+    Tuple,
+)
+
+import yaml
+
+from .manifest import Fingerprint, Manifest
+
+if TYPE_CHECKING:
+    # tsdat takes seconds to import, so it is only imported once a pipeline is run
+    from tsdat import Pipeline, PipelineConfig
 
 logger = logging.getLogger(__name__)
 
-__all__ = ["PipelineRegistry"]
+__all__ = ["PipelineRegistry", "PlotMode"]
+
+
+class PlotMode(str, Enum):
+    """When pipelines should create their plots."""
+
+    inline = "inline"
+    """Create plots right after the data are saved (the default)."""
+
+    deferred = "deferred"
+    """Create plots in a separate pool of worker processes while other input keys are
+    processed."""
+
+    off = "off"
+    """Do not create plots."""
+
+
+class _RecordCollector(logging.Handler):
+    """Collects log records emitted in a worker process so they can be sent back to
+    the parent process and logged there as one uninterrupted block."""
+
+    def __init__(self):
+        super().__init__()
+        self.records: List[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord):
+        # Format messages and tracebacks here so the records can be pickled
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        self.records.append(record)
+
+
+_GROUP_KEY_REGEX = re.compile(
+    r"^[^.]+\.(?P<buoy>[^.]+)\.[^.]+\.(?P<date>\d{8})\.(?P<time>\d{6})\."
+)
+"""Parses input file names like 'buoy.z07.00.20230801.000000.gps.csv'."""
+
+
+# The number of triggers from which matching input keys with the trigger index is
+# faster than evaluating every trigger (measured with 80-character paths: about 10 us vs
+# 90 us per key for the 12 bundled triggers, and equal at roughly 40 triggers)
+_TRIGGER_INDEX_MIN_SIZE = 64
+
+# Appended to the code version of fingerprints recorded for runs without plots
+_NO_PLOTS_VERSION = ":no-plots"
+
+
+def _read_yaml(filepath: Path) -> Dict[Any, Any]:
+    # Same as tsdat.read_yaml, which would require importing tsdat
+    return list(yaml.safe_load_all(filepath.read_text(encoding="UTF-8")))[0]
+
+
+def _hash_files(files: List[Path]) -> str:
+    sha = hashlib.sha256()
+    for file in files:
+        with open(file, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                sha.update(block)
+    return sha.hexdigest()
+
+
+def _get_group_key(input_key: str, window: int) -> Optional[Tuple[str, int]]:
+    """Returns the buoy id and time window index of the input key, or None if these
+    cannot be parsed from its file name."""
+    match = _GROUP_KEY_REGEX.match(Path(input_key).name)
+    if match is None:
+        return None
+    try:
+        timestamp = datetime.strptime(match["date"] + match["time"], "%Y%m%d%H%M%S")
+    except ValueError:
+        return None
+    seconds = int(timestamp.replace(tzinfo=timezone.utc).timestamp())
+    return match["buoy"], seconds // window if window > 0 else seconds
+
+
+def _skip_brackets(pattern: str, i: int) -> int:
+    """Returns the index just past the character class or group starting at i."""
+    if pattern[i] == "[":
+        i += 1
+        if i < len(pattern) and pattern[i] == "^":
+            i += 1
+        if i < len(pattern) and pattern[i] == "]":
+            i += 1
+        while i < len(pattern) and pattern[i] != "]":
+            i += 2 if pattern[i] == "\\" else 1
+        return i + 1
+
+    depth = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            i += 2
+            continue
+        if char == "[":
+            i = _skip_brackets(pattern, i)
+            continue
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return i
+
+
+# The number of hex digits in \x, \u, and \U escapes
+_HEX_ESCAPE_DIGITS = {"x": 2, "u": 4, "U": 8}
+
+
+def _skip_escape(pattern: str, i: int) -> Optional[int]:
+    """Returns the index just past the escape sequence starting with a backslash
+    followed by a letter or digit at i (e.g., '\\d', '\\x2e', '\\012', or
+    '\\N{FULL STOP}'), or None if the end of the sequence cannot be found."""
+    if i + 1 >= len(pattern):
+        return None
+    char = pattern[i + 1]
+    if char in _HEX_ESCAPE_DIGITS:
+        return i + 2 + _HEX_ESCAPE_DIGITS[char]
+    if char == "N":
+        end = pattern.find("}", i)
+        return end + 1 if end != -1 else None
+    if char.isdigit():
+        # Octal escapes and group references have up to 3 digits
+        end = i + 1
+        while end < min(len(pattern), i + 4) and pattern[end].isdigit():
+            end += 1
+        return end
+    return i + 2
+
+
+def _required_literals(pattern: str) -> List[str]:
+    """Returns runs of literal characters that every string matched by the regex
+    pattern must contain. Groups, character classes, and escapes like \\d or \\x2e end
+    a run, and a top-level alternation means no run is required."""
+    runs: List[str] = []
+    run = ""
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\" and i + 1 < len(pattern) and not pattern[i + 1].isalnum():
+            run += pattern[i + 1]
+            i += 2
+        elif char == "|":
+            return []
+        elif char in "*?+{":
+            # The last character may be repeated or optional, so it ends the run
+            runs.append(run[:-1])
+            run = ""
+            i = pattern.find("}", i) + 1 if char == "{" else i + 1
+            if i == 0:
+                return []
+        elif char in "[(":
+            runs.append(run)
+            run = ""
+            i = _skip_brackets(pattern, i)
+        elif char == "\\":
+            runs.append(run)
+            run = ""
+            end = _skip_escape(pattern, i)
+            if end is None:
+                return []
+            i = end
+        elif char in ".^$":
+            runs.append(run)
+            run = ""
+            i += 1
+        else:
+            run += char
+            i += 1
+    runs.append(run)
+    return [run for run in runs if run]
+
+
+class _CachedPipeline(NamedTuple):
+    files: List[Path]
+    """The pipeline config file and the component config files it references."""
+    mtimes: List[int]
+    config: "PipelineConfig"
+    pipeline: "Pipeline"
+
+
+@contextmanager
+def _collect_logs(level: int) -> Iterator[_RecordCollector]:
+    """Captures log records in a worker process instead of writing them to the
+    (shared) stream handlers inherited from the parent process."""
+    root = logging.getLogger()
+    handlers, root_level = root.handlers, root.level
+    collector = _RecordCollector()
+    root.handlers = [collector]
+    root.setLevel(level)
+    try:
+        yield collector
+    finally:
+        root.handlers = handlers
+        root.setLevel(root_level)
+
+
+@contextmanager
+def _intercept_saved_datasets(
+    pipeline: "Pipeline", callback: Callable[[Any], None]
+) -> Iterator[None]:
+    """Temporarily replaces the pipeline's `hook_plot_dataset`, which IngestPipelines
+    call with each dataset right after saving it (once per chunk for chunked runs),
+    with `callback`."""
+    cls = type(pipeline)
+    original = cls.__dict__.get("hook_plot_dataset")
+    cls.hook_plot_dataset = lambda self, dataset: callback(dataset)
+    try:
+        yield
+    finally:
+        if original is None:
+            del cls.hook_plot_dataset
+        else:
+            cls.hook_plot_dataset = original
+
+
+_worker_registry: Optional["PipelineRegistry"] = None
+
+
+def _get_worker_registry(plots: Optional[PlotMode]) -> "PipelineRegistry":
+    global _worker_registry
+    if _worker_registry is None:
+        _worker_registry = PipelineRegistry()
+    _worker_registry.plots = plots
+    return _worker_registry
+
+
+def _run_in_worker(
+    config_file: Path, inputs: List[str], level: int, plots: Optional[PlotMode]
+) -> Tuple[Optional[List[str]], List[Tuple[Path, Any]], List[logging.LogRecord]]:
+    """Runs a pipeline in a worker process. Returns the outputs, the datasets whose
+    plots were deferred, and the log records from the run."""
+    registry = _get_worker_registry(plots)
+    with _collect_logs(level) as collector:
+        outputs = registry._run(config_file, inputs)
+    deferred, registry._deferred_plots = registry._deferred_plots, []
+    return outputs, deferred, collector.records
+
+
+def _plot_in_worker(
+    config_file: Path, dataset: Any, level: int
+) -> Tuple[bool, List[logging.LogRecord]]:
+    """Creates the plots for a dataset in a worker process."""
+    registry = _get_worker_registry(PlotMode.inline)
+    with _collect_logs(level) as collector:
+        pipeline = registry._get_pipeline(config_file)
+        try:
+            pipeline.hook_plot_dataset(dataset)
+            success = True
+        except Exception:
+            logger.exception(
+                "Pipeline '%s' failed to create plots for %s",
+                pipeline.__repr_name__(),
+                dataset.attrs.get("datastream"),
+            )
+            success = False
+    return success, collector.records
+
 
 class PipelineRegistry:
     """---------------------------------------------------------------------------------
     Registry of Pipelines that can be run on input keys.
 
+    Args:
+        manifest (Optional[Manifest]): Manifest used to skip input keys that are
+            unchanged since they were last processed. Defaults to None.
+        plots (Optional[PlotMode]): When pipelines should create their plots. If None,
+            each pipeline uses the `plots` parameter from its pipeline config file,
+            or 'inline' if it is not set. Defaults to None.
+        plot_workers (int): The number of worker processes used to create deferred
+            plots. Defaults to 1.
+
     ---------------------------------------------------------------------------------"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        manifest: Optional[Manifest] = None,
+        plots: Optional[PlotMode] = None,
+        plot_workers: int = 1,
+    ):
+        self.manifest = manifest
+        self.plots = plots
+        self.plot_workers = plot_workers
+        self.failed_inputs: List[str] = []
+        self._deferred_plots: List[Tuple[Path, Any]] = []
+        self._plot_pool: Optional[ProcessPoolExecutor] = None
+        self._plot_futures: List["Future[Tuple[bool, List[logging.LogRecord]]]"] = []
         self._modules: List[str] = list()
         self._cache: Dict[Path, List[Pattern[str]]] = {}
+        self._pipelines: Dict[Path, _CachedPipeline] = {}
+        self._triggers: List[Tuple[Path, Pattern[str]]] = []
+        self._literal_index: Dict[str, List[int]] = {}
+        self._literal_lengths: List[int] = []
+        self._unindexed: List[int] = []
         self._load()
 
-    def dispatch(self, input_keys: List[str], clump: bool = False, multidispatch: bool = False) -> Tuple[int, int, int]:
+    def dispatch(
+        self,
+        input_keys: List[str],
+        clump: bool = False,
+        multidispatch: bool = False,
+        workers: int = 1,
+        group: bool = False,
+        group_window: int = 0,
+        force: bool = False,
+    ) -> Tuple[int, int, int]:
         """-----------------------------------------------------------------------------
         Instantiates and runs the appropriate Pipeline for the provided input files.
         according to the ingest's `mapping` specifications.
@@ -34,59 +357,452 @@ class PipelineRegistry:
                 multiple pipelines to process each input key. If True, any pipeline
                 whose regex pattern matches an input key will be used to process the
                 input key. Defaults to False.
+            workers (int): The number of worker processes used to run pipelines on
+                independent input keys concurrently. Ignored if `clump` is True.
+                Defaults to 1 (run everything in the current process).
+            group (bool): A flag indicating if related input keys should be processed
+                together. If True, the buoy id and timestamp are parsed from file names
+                like 'buoy.z07.00.20230801.000000.gps.csv', and keys matching the same
+                pipeline for the same buoy and time window are run as one clumped
+                pipeline call. Keys whose names cannot be parsed are run on their own.
+                Ignored if `clump` is True. Defaults to False.
+            group_window (int): The length of the time windows used to group input
+                keys, in seconds. If 0, only keys with identical timestamps are grouped.
+                Defaults to 0.
+            force (bool): A flag indicating if input keys recorded in the registry's
+                manifest should be processed again even if neither they nor the
+                pipeline config and code have changed. Only used if the registry has a
+                manifest and `clump` is False. Defaults to False.
 
         Returns:
-            bool: True if the Pipeline ran without error, False otherwise.
+            Tuple[int, int, int]: The number of successful, failed, and skipped runs.
+                Input keys skipped because they are unchanged since they were last
+                processed are counted as skipped. The input keys of the failed runs
+                are stored in `failed_inputs`.
 
         -----------------------------------------------------------------------------"""
+        if not clump:
+            jobs, skipped = self._get_jobs(
+                input_keys, multidispatch, group, group_window
+            )
+            jobs, fingerprints, unchanged = self._skip_unchanged(jobs, force)
+            if workers > 1:
+                results = self._run_parallel(jobs, workers)
+            else:
+                results = []
+                for config_file, inputs in jobs:
+                    results.append(self._run(config_file, inputs))
+                    self._submit_plots()
+
+            for (config_file, inputs), outputs, job_fingerprints in zip(
+                jobs, results, fingerprints
+            ):
+                if outputs is None or self.manifest is None:
+                    continue
+                for input_key, fingerprint in zip(inputs, job_fingerprints):
+                    self.manifest.record(input_key, config_file, fingerprint, outputs)
+
+            self.failed_inputs = list(
+                dict.fromkeys(
+                    input_key
+                    for (_, inputs), outputs in zip(jobs, results)
+                    if outputs is None
+                    for input_key in inputs
+                )
+            )
+            self._wait_for_plots()
+            successes = sum(outputs is not None for outputs in results)
+            failures = len(results) - successes
+            self._log_summary(successes, failures, skipped + unchanged, unchanged)
+            return successes, failures, skipped + unchanged
+
         successes = 0
         failures = 0
         skipped = 0
 
         for input_key in input_keys:
-            config_files = self._match_input_key(input_key)
+            config_files = self._get_config_files(input_key, multidispatch)
 
-            if not multidispatch and len(config_files) > 1:
-                raise RuntimeError(
-                        f"More than one match for input key '{input_key}'. Please"
-                        " update the pipeline triggers to remove duplicate matches."
-                        f" Found matches: {config_files}"
-                    )
-            elif not len(config_files):
-                logger.warning(
-                    "No pipeline configuration found matching input key '%s'", input_key
-                )
+            if not len(config_files):
                 skipped += 1
             else:
                 for config_file in config_files:
-                    config = PipelineConfig.from_yaml(config_file)
-                    pipeline = config.instantiate_pipeline()
-                    inputs = input_keys if clump else [input_key]
-                    logger.debug(
-                        "Running pipeline %s on input %s",
-                        pipeline.__repr_name__(),
-                        inputs,
-                    )
-                    try:
-                        pipeline.run(inputs)
+                    if self._run(config_file, input_keys) is not None:
                         successes += 1
-                        if clump:
-                            break
-                    except BaseException:
-                        logger.exception(
-                            "Pipeline '%s' failed to process input: %s",
-                            pipeline.__repr_name__(),
-                            inputs,
-                        )
+                        break
+                    else:
                         failures += 1
-        
+
+        self.failed_inputs = list(input_keys) if failures and not successes else []
+        self._wait_for_plots()
+        self._log_summary(successes, failures, skipped)
+        return successes, failures, skipped
+
+    def _get_jobs(
+        self,
+        input_keys: List[str],
+        multidispatch: bool,
+        group: bool = False,
+        group_window: int = 0,
+    ) -> Tuple[List[Tuple[Path, List[str]]], int]:
+        """-----------------------------------------------------------------------------
+        Matches each input key to the pipeline(s) that should process it.
+
+        Args:
+            input_keys (List[str]]): A list of keys that the pipeline will process.
+            multidispatch (bool): See `dispatch`.
+            group (bool): See `dispatch`.
+            group_window (int): See `dispatch`.
+
+        Returns:
+            Tuple[List[Tuple[Path, List[str]]], int]: The pipeline runs to perform, as
+                (config file, input keys) pairs, and the number of skipped input keys.
+
+        -----------------------------------------------------------------------------"""
+        jobs: Dict[Tuple[Any, ...], Tuple[Path, List[str]]] = {}
+        skipped = 0
+        for i, input_key in enumerate(input_keys):
+            config_files = self._get_config_files(input_key, multidispatch)
+            if not len(config_files):
+                skipped += 1
+                continue
+
+            group_key = _get_group_key(input_key, group_window) if group else None
+            if group and group_key is None:
+                logger.debug("Could not determine group for input key '%s'", input_key)
+            for config_file in config_files:
+                job_key = (config_file, *(group_key or (i,)))
+                jobs.setdefault(job_key, (config_file, []))[1].append(input_key)
+        return list(jobs.values()), skipped
+
+    def _skip_unchanged(
+        self, jobs: List[Tuple[Path, List[str]]], force: bool = False
+    ) -> Tuple[List[Tuple[Path, List[str]]], List[List[Fingerprint]], int]:
+        """-----------------------------------------------------------------------------
+        Fingerprints the input keys of each job and removes the jobs whose input keys
+        were all processed before with the same input content, pipeline config files,
+        and pipeline code, according to the registry's manifest, and whose recorded
+        outputs all still exist. Inputs processed without plots are processed again
+        when plots are turned on.
+
+        Args:
+            jobs (List[Tuple[Path, List[str]]]): The pipeline runs to perform.
+            force (bool): If True, no jobs are removed. Defaults to False.
+
+        Returns:
+            Tuple[List[Tuple[Path, List[str]]], List[List[Fingerprint]], int]: The jobs
+                to run, the fingerprints of each of their input keys, and the number
+                of input keys that were skipped.
+
+        -----------------------------------------------------------------------------"""
+        if self.manifest is None:
+            return jobs, [[] for _ in jobs], 0
+
+        remaining: List[Tuple[Path, List[str]]] = []
+        fingerprints: List[List[Fingerprint]] = []
+        unchanged = 0
+        versions: Dict[Path, Tuple[str, str]] = {}
+        for config_file, inputs in jobs:
+            if config_file not in versions:
+                code_version = self._get_code_version(config_file)
+                if self._plots_off(config_file):
+                    code_version += _NO_PLOTS_VERSION
+                versions[config_file] = (
+                    _hash_files(self._get_component_files(config_file)),
+                    code_version,
+                )
+            job_fingerprints = [
+                Fingerprint(self._hash_input(input_key), *versions[config_file])
+                for input_key in inputs
+            ]
+            if not force and all(
+                self._is_unchanged(input_key, config_file, fingerprint)
+                for input_key, fingerprint in zip(inputs, job_fingerprints)
+            ):
+                logger.debug("Skipping unchanged input: %s", inputs)
+                unchanged += len(inputs)
+                continue
+            remaining.append((config_file, inputs))
+            fingerprints.append(job_fingerprints)
+        return remaining, fingerprints, unchanged
+
+    @staticmethod
+    def _hash_input(input_key: str) -> str:
+        try:
+            return _hash_files([Path(input_key)])
+        except OSError:
+            return ""  # Not a local file, so it is always processed
+
+    def _is_unchanged(
+        self, input_key: str, config_file: Path, fingerprint: Fingerprint
+    ) -> bool:
+        """Returns True if the manifest shows the input key was processed with the same
+        fingerprint and all of the outputs recorded for it still exist."""
+        assert self.manifest is not None
+        if not fingerprint.content_hash:
+            return False
+        recorded = self.manifest.get(input_key, config_file)
+        # Inputs processed with plots are up to date for runs without plots too
+        with_plots = fingerprint._replace(
+            code_version=fingerprint.code_version.replace(_NO_PLOTS_VERSION, "")
+        )
+        if recorded not in (fingerprint, with_plots):
+            return False
+        outputs = self.manifest.get_outputs(input_key, config_file)
+        return all(Path(output).exists() for output in outputs)
+
+    def _plots_off(self, config_file: Path) -> bool:
+        try:
+            parameters = _read_yaml(config_file).get("parameters")
+            return self._get_configured_plot_mode(parameters) is PlotMode.off
+        except ValueError:
+            return False  # The run fails and reports the invalid plot mode
+
+    @staticmethod
+    def _get_code_version(config_file: Path) -> str:
+        """Hashes the tsdat version and the python modules of the pipeline (e.g., the
+        *.py files in pipelines/imu/ for pipelines/imu/config/pipeline_morro.yaml) and
+        of this package."""
+        modules = sorted(Path(config_file).parents[1].glob("*.py"))
+        modules += sorted(Path(__file__).parent.glob("*.py"))
+        return version("tsdat") + ":" + _hash_files(modules)
+
+    def _run_parallel(
+        self, jobs: List[Tuple[Path, List[str]]], workers: int
+    ) -> List[Optional[List[str]]]:
+        """-----------------------------------------------------------------------------
+        Runs each (config file, input keys) job in a pool of worker processes. Logs
+        from each run are collected in the worker and emitted by this process once the
+        run finishes, so output from concurrent runs is never interleaved.
+
+        Args:
+            jobs (List[Tuple[Path, List[str]]]): The pipeline runs to perform.
+            workers (int): The maximum number of worker processes.
+
+        Returns:
+            List[Optional[List[str]]]: The result of each job, as returned by `_run`.
+
+        -----------------------------------------------------------------------------"""
+        results: List[Optional[List[str]]] = [None] * len(jobs)
+
+        level = logging.getLogger().getEffectiveLevel()
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs) or 1)) as pool:
+            futures = {
+                pool.submit(_run_in_worker, config_file, inputs, level, self.plots): i
+                for i, (config_file, inputs) in enumerate(jobs)
+            }
+            for future in as_completed(futures):
+                try:
+                    outputs, deferred, records = future.result()
+                except Exception:
+                    # E.g., the worker process died or the pipeline config is invalid;
+                    # the job is recorded as failed like in `_run`
+                    config_file, inputs = jobs[futures[future]]
+                    logger.exception(
+                        "Pipeline config '%s' failed to process input: %s",
+                        config_file,
+                        inputs,
+                    )
+                    continue
+                for record in records:
+                    logging.getLogger(record.name).handle(record)
+                results[futures[future]] = outputs
+                self._deferred_plots.extend(deferred)
+                self._submit_plots()
+
+        return results
+
+    def _get_config_files(self, input_key: str, multidispatch: bool) -> List[Path]:
+        """-----------------------------------------------------------------------------
+        Returns the pipeline configuration files that should process the input key,
+        raising an error if there are several and `multidispatch` is False.
+
+        -----------------------------------------------------------------------------"""
+        config_files = self._match_input_key(input_key)
+
+        if not multidispatch and len(config_files) > 1:
+            raise RuntimeError(
+                f"More than one match for input key '{input_key}'. Please"
+                " update the pipeline triggers to remove duplicate matches."
+                f" Found matches: {config_files}"
+            )
+        elif not len(config_files):
+            logger.warning(
+                "No pipeline configuration found matching input key '%s'", input_key
+            )
+        return config_files
+
+    def _run(self, config_file: Path, inputs: List[str]) -> Optional[List[str]]:
+        """-----------------------------------------------------------------------------
+        Instantiates the pipeline from the configuration file and runs it on the inputs.
+
+        Returns:
+            Optional[List[str]]: The paths to the data files written by the Pipeline if
+                it ran without error, or None otherwise.
+
+        -----------------------------------------------------------------------------"""
+        pipeline = self._get_pipeline(config_file)
+        logger.debug(
+            "Running pipeline %s on input %s",
+            pipeline.__repr_name__(),
+            inputs,
+        )
+        plot = type(pipeline).hook_plot_dataset
+        outputs: Set[str] = set()
+
+        # Outputs are collected as each dataset is saved so every chunk of a chunked
+        # run is recorded, not just the last one
+        def on_saved(dataset: Any):
+            outputs.update(self._get_outputs(pipeline, dataset))
+            if plots is PlotMode.inline:
+                plot(pipeline, dataset)
+            elif plots is PlotMode.deferred:
+                self._deferred_plots.append((config_file, dataset))
+
+        try:
+            # Invalid plot modes only fail this run
+            plots = self._get_plot_mode(pipeline)
+            with _intercept_saved_datasets(pipeline, on_saved):
+                dataset = pipeline.run(inputs)
+        except BaseException:
+            logger.exception(
+                "Pipeline '%s' failed to process input: %s",
+                pipeline.__repr_name__(),
+                inputs,
+            )
+            return None
+        if not outputs:  # The pipeline did not call hook_plot_dataset
+            outputs.update(self._get_outputs(pipeline, dataset))
+        return sorted(outputs)
+
+    def _get_plot_mode(self, pipeline: "Pipeline") -> PlotMode:
+        return self._get_configured_plot_mode(pipeline.parameters)
+
+    def _get_configured_plot_mode(self, parameters: Any) -> PlotMode:
+        """Returns the registry's plot mode, or else the one in the `parameters` of a
+        pipeline config."""
+        if self.plots is not None:
+            return PlotMode(self.plots)
+        if not isinstance(parameters, dict):
+            parameters = {}
+        plots = parameters.get("plots", PlotMode.inline)
+        if isinstance(plots, bool):  # YAML 1.1 reads unquoted on/off as booleans
+            return PlotMode.inline if plots else PlotMode.off
+        return PlotMode(plots)
+
+    def _submit_plots(self):
+        """Submits the deferred plots to the plot worker pool."""
+        if not self._deferred_plots:
+            return
+        if self._plot_pool is None:
+            self._plot_pool = ProcessPoolExecutor(max_workers=self.plot_workers)
+        level = logging.getLogger().getEffectiveLevel()
+        for config_file, dataset in self._deferred_plots:
+            self._plot_futures.append(
+                self._plot_pool.submit(_plot_in_worker, config_file, dataset, level)
+            )
+        self._deferred_plots = []
+
+    def _wait_for_plots(self):
+        """Waits for the deferred plots to be created and logs the results."""
+        self._submit_plots()
+        failures = 0
+        for future in as_completed(self._plot_futures):
+            try:
+                success, records = future.result()
+            except Exception:
+                logger.exception("Failed to create deferred plots")
+                failures += 1
+                continue
+            for record in records:
+                logging.getLogger(record.name).handle(record)
+            failures += not success
+        if self._plot_futures:
+            logger.info(
+                "Created deferred plots for %s dataset(s) with %s failures.",
+                len(self._plot_futures),
+                failures,
+            )
+        self._plot_futures = []
+
+    @staticmethod
+    def _get_outputs(pipeline: "Pipeline", dataset: Any) -> List[str]:
+        import xarray as xr
+
+        storage = getattr(pipeline, "storage", None)
+        if not isinstance(dataset, xr.Dataset) or storage is None:
+            return []
+        try:
+            filepath: Path = storage._get_dataset_filepath(dataset)
+        except Exception:
+            return []
+        # Some writers (e.g., CSVWriter) split the dataset across several files named
+        # after the standard path
+        files = {*filepath.parent.glob(glob.escape(filepath.stem) + ".*"), filepath}
+        return sorted(file.as_posix() for file in files if file.is_file())
+
+    def _get_pipeline(self, config_file: Path) -> "Pipeline":
+        """-----------------------------------------------------------------------------
+        Returns the pipeline for the configuration file, reusing the one instantiated
+        by a previous run unless the pipeline config file or any of the retriever,
+        dataset, quality, or storage config files it references have since changed.
+
+        Args:
+            config_file (Path): The path to the pipeline configuration file.
+
+        Returns:
+            Pipeline: The instantiated pipeline.
+
+        -----------------------------------------------------------------------------"""
+        cached = self._pipelines.get(config_file)
+        if cached is not None and cached.mtimes == self._get_mtimes(cached.files):
+            return cached.pipeline
+
+        from tsdat import PipelineConfig
+
+        files = self._get_component_files(config_file)
+        mtimes = self._get_mtimes(files)
+
+        config = PipelineConfig.from_yaml(config_file)
+        pipeline = config.instantiate_pipeline()
+        self._pipelines[config_file] = _CachedPipeline(files, mtimes, config, pipeline)
+        logger.debug("Instantiated pipeline from config '%s'", config_file)
+        return pipeline
+
+    @staticmethod
+    def _get_component_files(config_file: Path) -> List[Path]:
+        """Returns the pipeline config file and the retriever, dataset, quality, and
+        storage config files it references."""
+        files = [config_file]
+        for component in _read_yaml(config_file).values():
+            if isinstance(component, dict) and "path" in component:
+                files.append(Path(component["path"]))
+        return files
+
+    @staticmethod
+    def _get_mtimes(files: List[Path]) -> List[int]:
+        mtimes: List[int] = []
+        for file in files:
+            try:
+                mtimes.append(file.stat().st_mtime_ns)
+            except FileNotFoundError:
+                mtimes.append(-1)
+        return mtimes
+
+    def _log_summary(
+        self, successes: int, failures: int, skipped: int, unchanged: int = 0
+    ):
         logger.info(
             "Processing completed with %s successes, %s failures, and %s skipped.",
             successes,
             failures,
             skipped,
         )
-        return successes, failures, skipped
+        if unchanged:
+            logger.info(
+                "Skipped %s input(s) unchanged since they were last processed.",
+                unchanged,
+            )
 
     def _load(self, folder: Path = Path("pipelines")):
         """-----------------------------------------------------------------------------
@@ -100,12 +816,52 @@ class PipelineRegistry:
         -----------------------------------------------------------------------------"""
         config_paths = list(folder.glob("**/*pipeline*.yaml"))
         for path in config_paths:
-            trigger_strs = read_yaml(path)["triggers"]
+            trigger_strs = _read_yaml(path)["triggers"]
             triggers = [re.compile(trigger) for trigger in trigger_strs]
             self._cache[path] = triggers
             logger.debug(
                 "Registered pipeline config '%s' with triggers %s", path, trigger_strs
             )
+        self._build_trigger_index()
+
+    def _build_trigger_index(self):
+        """-----------------------------------------------------------------------------
+        Indexes the triggers of all registered pipelines by a literal substring that
+        any key matched by the trigger must contain (e.g., 'z05' in
+        '.*buoy.z05.*\\.imu.bin'). Matching an input key looks up each of its
+        substrings with the length of an indexed literal in the index and only
+        evaluates the triggers found, so its cost depends on the length of the key and
+        the number of distinct literal lengths, not on the number of registered
+        triggers. Each trigger is indexed by the literal that the fewest other
+        triggers share; triggers without a usable literal are always evaluated.
+
+        The index is only used once there are at least `_TRIGGER_INDEX_MIN_SIZE`
+        triggers; below that, evaluating every trigger is faster.
+
+        -----------------------------------------------------------------------------"""
+        self._triggers = [
+            (path, regex)
+            for path, regex_list in self._cache.items()
+            for regex in regex_list
+        ]
+
+        literals: List[List[str]] = []
+        for _, regex in self._triggers:
+            if regex.flags & (re.IGNORECASE | re.VERBOSE):
+                literals.append([])
+            else:
+                literals.append(_required_literals(regex.pattern))
+        counts = Counter(literal for lits in literals for literal in set(lits))
+
+        self._literal_index = {}
+        self._unindexed = []
+        for i, lits in enumerate(literals):
+            if not lits:
+                self._unindexed.append(i)
+                continue
+            literal = min(lits, key=lambda lit: (counts[lit], -len(lit)))
+            self._literal_index.setdefault(literal, []).append(i)
+        self._literal_lengths = sorted({len(lit) for lit in self._literal_index})
 
     def _match_input_key(self, input_key: str) -> List[Path]:
         """-----------------------------------------------------------------------------
@@ -121,11 +877,23 @@ class PipelineRegistry:
 
         -----------------------------------------------------------------------------"""
 
+        if len(self._triggers) < _TRIGGER_INDEX_MIN_SIZE:
+            candidates = set(range(len(self._triggers)))
+        else:
+            candidates = set(self._unindexed)
+            for length in self._literal_lengths:
+                for start in range(len(input_key) - length + 1):
+                    substring = input_key[start : start + length]
+                    indices = self._literal_index.get(substring)
+                    if indices:
+                        candidates.update(indices)
+
+        # Evaluate candidates in registration order so matches are returned in the
+        # same order as the registered configs
         matches: List[Path] = []
-        for path, regex_list in self._cache.items():
-            for regex in regex_list:
-                if regex.match(input_key):
-                    matches.append(path)
-                    break
+        for i in sorted(candidates):
+            path, regex = self._triggers[i]
+            if path not in matches and regex.match(input_key):
+                matches.append(path)
         return matches
         
\ No newline at end of file
@@ -0,0 +1,243 @@
+import logging
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .registry import PipelineRegistry
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["DirectoryWatcher"]
+
+
+class DirectoryWatcher:
+    """---------------------------------------------------------------------------------
+    Watches a folder for new or modified input files and dispatches them to a warm
+    PipelineRegistry as they arrive.
+
+    The folder is polled every `poll_interval` seconds. A file is only dispatched once
+    its size and modification time have stayed the same for `settle_time` seconds, so
+    files that are still being written or copied are not picked up early. Files that do
+    not match any pipeline trigger are ignored. Ready files are passed to a single
+    dispatching thread through a queue holding at most `max_queued` files; polling
+    pauses while the queue is full. Files whose pipeline run fails are queued again,
+    up to `max_retries` times, once they have settled again; after that they are only
+    processed again if they are modified.
+
+    Args:
+        registry (PipelineRegistry): The registry used to match and run pipelines.
+        folder (Path): The folder to watch.
+        pattern (str): Glob pattern (relative to `folder`) of the files to watch.
+            Defaults to "**/*" (every file in the folder and its subfolders).
+        poll_interval (float): Seconds between scans of the folder. Defaults to 1.
+        settle_time (float): Seconds a file must stay unchanged before it is
+            dispatched. Defaults to 2.
+        max_queued (int): Maximum number of files waiting to be processed. Defaults
+            to 100.
+        workers (int): Passed to `PipelineRegistry.dispatch`. Defaults to 1.
+        max_retries (int): The number of times a file whose pipeline run failed is
+            queued again. Defaults to 3.
+        skip_existing (bool): If True, files already in the folder when the watcher
+            starts are not processed unless they are modified. Defaults to False.
+
+    ---------------------------------------------------------------------------------"""
+
+    def __init__(
+        self,
+        registry: PipelineRegistry,
+        folder: Path,
+        pattern: str = "**/*",
+        poll_interval: float = 1.0,
+        settle_time: float = 2.0,
+        max_queued: int = 100,
+        workers: int = 1,
+        max_retries: int = 3,
+        skip_existing: bool = False,
+    ):
+        self.registry = registry
+        self.folder = Path(folder)
+        self.pattern = pattern
+        self.poll_interval = poll_interval
+        self.settle_time = settle_time
+        self.workers = workers
+        self.max_retries = max_retries
+        self._queue: "queue.Queue[str]" = queue.Queue(maxsize=max_queued)
+        # Files whose pipeline run failed, passed back by the dispatching thread
+        self._failed: "queue.SimpleQueue[Path]" = queue.SimpleQueue()
+
+        # (size, mtime) of files waiting to settle and the time they last changed
+        self._pending: Dict[Path, Tuple[int, int, float]] = {}
+        # (size, mtime) of files that were already queued
+        self._done: Dict[Path, Tuple[int, int]] = {}
+        # (size, mtime) of files whose pipeline run failed and the number of failures
+        self._failures: Dict[Path, Tuple[Tuple[int, int], int]] = {}
+        # Whether each file in the folder matches a pipeline trigger
+        self._matches: Dict[Path, bool] = {}
+
+        if skip_existing:
+            for path, signature in self._scan().items():
+                self._done[path] = signature
+
+    def run(self, stop: Optional[threading.Event] = None):
+        """-----------------------------------------------------------------------------
+        Watches the folder until `stop` is set (or until interrupted with Ctrl+C). The
+        pipeline run in progress when the watcher is stopped is allowed to finish.
+
+        Args:
+            stop (Optional[threading.Event]): Event used to stop the watcher from
+                another thread. Defaults to None.
+
+        -----------------------------------------------------------------------------"""
+        stop = stop or threading.Event()
+        consumer = threading.Thread(target=self._consume, args=(stop,), daemon=True)
+        consumer.start()
+        logger.info("Watching '%s' for new input files", self.folder)
+        try:
+            while not stop.is_set():
+                for path in self.poll():
+                    self._put(str(path), stop)
+                stop.wait(self.poll_interval)
+        except KeyboardInterrupt:
+            logger.info("Stopping after the current pipeline run finishes")
+        finally:
+            stop.set()
+            consumer.join()
+
+    def poll(self, now: Optional[float] = None) -> List[Path]:
+        """-----------------------------------------------------------------------------
+        Scans the folder once and returns the files that are ready to be processed.
+
+        Args:
+            now (Optional[float]): The current time.monotonic() value. Defaults to
+                None (use the actual time).
+
+        Returns:
+            List[Path]: Files matching a pipeline trigger that are new or modified and
+                have not changed for at least `settle_time` seconds.
+
+        -----------------------------------------------------------------------------"""
+        now = time.monotonic() if now is None else now
+        self._requeue_failed()
+        files = self._scan()
+
+        ready: List[Path] = []
+        for path, signature in files.items():
+            if self._done.get(path) == signature:
+                continue
+            pending = self._pending.get(path)
+            if pending is None or pending[:2] != signature:
+                self._pending[path] = (*signature, now)
+            elif now - pending[2] >= self.settle_time:
+                del self._pending[path]
+                self._done[path] = signature
+                ready.append(path)
+
+        # Forget files that were removed so they are processed again if they return
+        for path in set(self._pending).difference(files):
+            del self._pending[path]
+        for path in set(self._done).difference(files):
+            del self._done[path]
+        for path in set(self._failures).difference(files):
+            del self._failures[path]
+
+        return ready
+
+    def _requeue_failed(self):
+        """Forgets that failed files were queued so they are queued again once they
+        settle, unless they already failed `max_retries` times."""
+        while True:
+            try:
+                path = self._failed.get_nowait()
+            except queue.Empty:
+                return
+            signature = self._done.get(path)
+            if signature is None:
+                continue  # Removed or modified since it was queued
+
+            # Files are retried again from scratch once they are modified
+            previous, failures = self._failures.get(path, (signature, 0))
+            failures = failures + 1 if previous == signature else 1
+            self._failures[path] = (signature, failures)
+            if failures > self.max_retries:
+                logger.error(
+                    "Giving up on input file '%s' after %s failed attempts; it will be"
+                    " processed again if it is modified",
+                    path,
+                    failures,
+                )
+                continue
+            logger.warning(
+                "Queueing input file '%s' again after failed attempt %s of %s",
+                path,
+                failures,
+                self.max_retries + 1,
+            )
+            del self._done[path]
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        files: Dict[Path, Tuple[int, int]] = {}
+        matches: Dict[Path, bool] = {}
+        for path in sorted(self.folder.glob(self.pattern)):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue  # Removed while scanning
+            if not path.is_file():
+                continue
+            # The triggers do not change while watching, so each file is only matched
+            # once while it stays in the folder
+            matched = self._matches.get(path)
+            if matched is None:
+                matched = bool(self.registry._match_input_key(str(path)))
+            matches[path] = matched
+            if matched:
+                files[path] = (stat.st_size, stat.st_mtime_ns)
+        self._matches = matches
+        return files
+
+    def _put(self, input_key: str, stop: threading.Event):
+        while not stop.is_set():
+            try:
+                self._queue.put(input_key, timeout=self.poll_interval)
+                logger.debug("Queued input file '%s'", input_key)
+                return
+            except queue.Full:
+                logger.debug("Work queue is full; waiting to queue '%s'", input_key)
+
+    def _consume(self, stop: threading.Event):
+        while not stop.is_set():
+            try:
+                input_keys = [self._queue.get(timeout=self.poll_interval)]
+            except queue.Empty:
+                continue
+            while True:
+                try:
+                    input_keys.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._dispatch(input_keys)
+
+    def _dispatch(self, input_keys: List[str]):
+        """Dispatches the input files and passes the ones that failed back to the
+        polling thread to be retried."""
+        try:
+            self.registry.dispatch(input_keys, workers=self.workers)
+            failed = self.registry.failed_inputs
+        except Exception:
+            if len(input_keys) > 1:
+                # Dispatch each file on its own so one bad file (e.g., one matching
+                # several pipelines) does not fail the files queued with it
+                logger.warning(
+                    "Failed to dispatch %s input files together; dispatching them"
+                    " one at a time",
+                    len(input_keys),
+                )
+                for input_key in input_keys:
+                    self._dispatch([input_key])
+                return
+            logger.exception("Failed to dispatch input files: %s", input_keys)
+            failed = input_keys
+        for input_key in failed:
+            self._failed.put(Path(input_key))